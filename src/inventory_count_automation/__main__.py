@@ -1,25 +1,223 @@
+from collections import Counter
+from pathlib import Path
+import argparse
+import socket
 import sys
 
-from inventory_count_automation.settings import load_config, CONFIG_PATH
+from inventory_count_automation.settings import load_config, LayoutConfig, CONFIG_PATH
 from inventory_count_automation.counter import count_barcodes, summary
-from inventory_count_automation.excel_handler import assign_balances
-from inventory_count_automation.reader import read_all_barcodes, ReadResult
-from inventory_count_automation.cli import run_setup
+from inventory_count_automation.excel_handler import assign_balances, load_indexed_workbook, IndexedWorkbook
+from inventory_count_automation.pipeline import run_pipelined, print_timings
+from inventory_count_automation.reader import read_all_barcodes
+from inventory_count_automation.partial import count_directory, load_partial, merge_partials, save_partial
+from inventory_count_automation.provenance import Provenance
+from inventory_count_automation.anomaly import BurstDetector, print_bursts, DEFAULT_BURST_THRESHOLD
+from inventory_count_automation.reconciliation import reconcile, print_reconciliation, DEFAULT_TOP_N
+from inventory_count_automation.rejected import (
+    RejectedLines,
+    write_rejected_report,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_REJECTED_LIMIT,
+)
+from inventory_count_automation.cli import run_setup, add_layout_arguments, run_layout_command
+from inventory_count_automation.session import CountSession
+from inventory_count_automation.server import SessionServer, DEFAULT_HOST, DEFAULT_PORT
+
+# Quantidade máxima de origens exibidas por código no relatório
+MAX_ORIGINS_SHOWN = 3
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="inventory-count",
+        description="Consolida contagens de barcodes (.txt) e atualiza a planilha de inventário.",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--setup",
+        action="store_true",
+        help="abre o setup interativo de layouts",
+    )
+    mode.add_argument(
+        "--count-only",
+        type=Path,
+        metavar="DIR",
+        help="apenas contabiliza os .txt de DIR e grava uma contagem parcial (ver --output)",
+    )
+    mode.add_argument(
+        "--merge",
+        type=Path,
+        nargs="+",
+        metavar="ARQUIVO",
+        help="combina contagens parciais e atribui os saldos na planilha",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        metavar="ARQUIVO",
+        help="arquivo da contagem parcial gerada por --count-only (padrão: parcial-<nó>.json.gz)",
+    )
+    parser.add_argument(
+        "--node",
+        metavar="NOME",
+        help="nome do nó registrado na contagem parcial (padrão: hostname)",
+    )
+    parser.add_argument(
+        "--provenance",
+        action="store_true",
+        help="registra arquivo/linha/offset de cada leitura e exibe a origem no relatório",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="lê os .txt num processo separado enquanto a planilha é carregada e indexada",
+    )
+    parser.add_argument(
+        "--burst-threshold",
+        type=int,
+        metavar="N",
+        help=(
+            "sinaliza sequências de N ou mais leituras idênticas seguidas "
+            f"(ex.: gatilho travado; padrão com --burst-cap: {DEFAULT_BURST_THRESHOLD}); "
+            "em contagem distribuída, use no --count-only de cada nó"
+        ),
+    )
+    parser.add_argument(
+        "--burst-cap",
+        type=int,
+        metavar="N",
+        help=(
+            "contabiliza no máximo N leituras de cada sequência sinalizada "
+            "(não combina com --merge: aplique no --count-only de cada nó)"
+        ),
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=DEFAULT_TOP_N,
+        metavar="N",
+        help=f"quantidade de divergências exibidas na conciliação (padrão: {DEFAULT_TOP_N})",
+    )
+    rejected = parser.add_argument_group("linhas rejeitadas")
+    rejected.add_argument(
+        "--rejected-limit",
+        type=int,
+        default=DEFAULT_REJECTED_LIMIT,
+        metavar="N",
+        help=(
+            "linhas rejeitadas distintas contadas com exatidão; acima disso mantém só as mais "
+            f"frequentes e estima as distintas (padrão: {DEFAULT_REJECTED_LIMIT})"
+        ),
+    )
+    rejected.add_argument(
+        "--rejected-all",
+        action="store_true",
+        help="mantém todas as linhas rejeitadas distintas, sem limite de memória",
+    )
+    rejected.add_argument(
+        "--rejected-page",
+        type=int,
+        default=1,
+        metavar="N",
+        help="página do relatório de linhas rejeitadas exibida no console (padrão: 1)",
+    )
+    rejected.add_argument(
+        "--rejected-page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        metavar="N",
+        help=f"linhas rejeitadas por página (padrão: {DEFAULT_PAGE_SIZE})",
+    )
+    rejected.add_argument(
+        "--rejected-report",
+        type=Path,
+        metavar="ARQUIVO",
+        help="grava todas as linhas rejeitadas mantidas em ARQUIVO (TSV)",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMANDO")
+    layout = commands.add_parser(
+        "layout",
+        help="configura layouts sem interação (para scripts e automação)",
+        description="Adiciona, edita, valida e ativa layouts a partir de opções ou de um patch JSON/TOML.",
+    )
+    add_layout_arguments(layout)
+
+    serve = commands.add_parser(
+        "serve",
+        help="mantém a contagem carregada e atende requisições HTTP/JSON locais",
+        description="Serviço HTTP/JSON local sobre uma sessão de contagem (ver server.py para as rotas).",
+    )
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"endereço de escuta (padrão: {DEFAULT_HOST})")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"porta (padrão: {DEFAULT_PORT})")
+    serve.add_argument("--layout", metavar="NOME", help="layout usado (padrão: o layout ativo)")
+    serve.add_argument(
+        "--auto-reload",
+        action="store_true",
+        help="recarrega config.toml e planilha automaticamente quando forem alterados",
+    )
+    serve.add_argument("--verbose", action="store_true", help="registra cada requisição no console")
+    return parser.parse_args(argv)
+
+
+def _format_origins(provenance: Provenance | None, key: str) -> str:
+    """Formata as origens de um código como ``arquivo:linha``, limitado a MAX_ORIGINS_SHOWN."""
+    if provenance is None:
+        return ""
+
+    occurrences = provenance.locate(key)
+    if not occurrences:
+        return ""
+
+    shown = ", ".join(
+        f"{Path(occ.file).name}:{occ.line}" for occ in occurrences[:MAX_ORIGINS_SHOWN]
+    )
+    remaining = len(occurrences) - MAX_ORIGINS_SHOWN
+    if remaining > 0:
+        shown += f" (+{remaining})"
+    return f"  ← {shown}"
+
+
+def _print_rejected(
+    rejected: RejectedLines,
+    provenance: Provenance | None,
+    page: int,
+    page_size: int,
+) -> None:
+    """Exibe uma página das linhas rejeitadas, das mais frequentes para as menos."""
+    distinct = f"~{rejected.distinct} únicas (estimativa)" if rejected.approximate else f"{rejected.distinct} únicas"
+    print(f"\n  ❌ Linhas rejeitadas na leitura ({rejected.total} ocorrências, {distinct}):")
+    print("     Não correspondem ao padrão de barcode configurado.")
+    if rejected.approximate:
+        print(
+            f"     Acima do limite de linhas distintas: exibindo só as mais frequentes "
+            f"(ocorrências podem estar subestimadas em até {rejected.error_bound})."
+        )
+
+    pages = rejected.pages(page_size)
+    print(f"     Página {page} de {pages}:\n")
+    for line, n in rejected.page(page, page_size):
+        print(f"     • {line}  (×{n}){_format_origins(provenance, line)}")
+    if page < pages:
+        print(f"\n     ... use --rejected-page {page + 1} ou --rejected-report ARQUIVO para ver mais.")
 
 
 def _print_unmatched_report(
-    read_result: ReadResult,
+    rejected: RejectedLines,
     not_found: list[str],
     counted: dict[str, int],
+    provenance: Provenance | None = None,
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
 ) -> None:
     """
     Exibe o relatório detalhado dos códigos não identificados.
 
     Inclui:
-    - Linhas rejeitadas na leitura (não correspondem ao padrão de barcode)
+    - Linhas rejeitadas na leitura (não correspondem ao padrão de barcode),
+      paginadas e ordenadas por ocorrências
     - Barcodes lidos nos .txt mas não encontrados na planilha
     """
-    has_issues = bool(read_result.rejected) or bool(not_found)
+    has_issues = bool(rejected) or bool(not_found)
 
     if not has_issues:
         print("\n  ✅ Todos os códigos foram identificados e atribuídos com sucesso!")
@@ -29,16 +227,8 @@ def _print_unmatched_report(
     print("  📋 RELATÓRIO DE CÓDIGOS NÃO IDENTIFICADOS")
     print("=" * 60)
 
-    if read_result.rejected:
-        unique_rejected = sorted(set(read_result.rejected))
-        print(
-            f"\n  ❌ Linhas rejeitadas na leitura "
-            f"({len(read_result.rejected)} ocorrências, "
-            f"{len(unique_rejected)} únicas):"
-        )
-        print("     Não correspondem ao padrão de barcode configurado.\n")
-        for line in unique_rejected:
-            print(f"     • {line}")
+    if rejected:
+        _print_rejected(rejected, provenance, page, page_size)
 
     if not_found:
         print(
@@ -48,17 +238,130 @@ def _print_unmatched_report(
         print("     Lidos nos .txt, mas sem correspondência na planilha.\n")
         for barcode in sorted(not_found):
             qty = counted.get(barcode, 0)
-            print(f"     • {barcode}  (qtd lida: {qty})")
+            origins = _format_origins(provenance, barcode)
+            print(f"     • {barcode}  (qtd lida: {qty}){origins}")
 
     print()
 
 
-def main() -> None:
+def _run_server(args: argparse.Namespace) -> None:
+    """Subcomando serve: atende requisições até Ctrl+C."""
+    try:
+        session = CountSession(CONFIG_PATH, layout_name=args.layout, auto_reload=args.auto_reload)
+        server = SessionServer(session, args.host, args.port, verbose=args.verbose)
+    except (ValueError, OSError) as e:
+        print(f"\n❌ Erro: {e}")
+        sys.exit(1)
+
+    host, port = server.server_address[:2]
+    print(f"  🌐 Servindo em http://{host}:{port} (layout '{session.stats()['layout']}') — Ctrl+C para encerrar")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n  👋 Encerrando.")
+    finally:
+        server.server_close()
+
+
+def _check_mode_flags(args: argparse.Namespace) -> None:
+    """Recusa opções que o modo --count-only ou --merge ignoraria."""
+    if args.count_only is not None:
+        mode, flags = "--count-only", {"--provenance": args.provenance, "--pipeline": args.pipeline}
+        reason = "a contagem parcial guarda só os totais e não carrega a planilha"
+    elif args.merge:
+        mode, flags = "--merge", {"--provenance": args.provenance, "--pipeline": args.pipeline}
+        reason = "as parciais só têm os totais, sem a origem das leituras, e não há .txt a ler"
+    else:
+        return
+
+    ignored = [flag for flag, enabled in flags.items() if enabled]
+    if ignored:
+        print(f"\n❌ Erro: {'/'.join(ignored)} não se aplica(m) ao {mode}: {reason}.")
+        sys.exit(1)
+
+
+def _make_detector(args: argparse.Namespace) -> BurstDetector | None:
+    """Cria o detector de rajadas se --burst-threshold ou --burst-cap foram informados."""
+    if args.burst_threshold is None and args.burst_cap is None:
+        return None
+
+    if args.merge:
+        # As parciais só têm os totais: as sequências precisam ser cortadas em cada nó
+        print(
+            "\n❌ Erro: --burst-threshold/--burst-cap não se aplicam ao --merge; "
+            "use-os no --count-only de cada nó."
+        )
+        sys.exit(1)
+
+    threshold = args.burst_threshold if args.burst_threshold is not None else DEFAULT_BURST_THRESHOLD
+    try:
+        return BurstDetector(threshold=threshold, cap=args.burst_cap)
+    except ValueError as e:
+        print(f"\n❌ Erro: {e}")
+        sys.exit(1)
+
+
+def _make_rejected(args: argparse.Namespace) -> RejectedLines:
+    """Cria o acumulador de linhas rejeitadas conforme --rejected-limit / --rejected-all."""
+    if args.rejected_page < 1 or args.rejected_page_size < 1:
+        print("\n❌ Erro: --rejected-page e --rejected-page-size devem ser maiores ou iguais a 1.")
+        sys.exit(1)
+    try:
+        return RejectedLines(limit=None if args.rejected_all else args.rejected_limit)
+    except ValueError as e:
+        print(f"\n❌ Erro: {e}")
+        sys.exit(1)
+
+
+def _run_count_only(
+    layout: LayoutConfig,
+    directory: Path,
+    output: Path | None,
+    node: str | None,
+    detector: BurstDetector | None,
+    rejected: RejectedLines,
+) -> None:
+    """Modo --count-only: gera a contagem parcial deste nó e grava em disco."""
+    if node is None:
+        node = socket.gethostname()
+
+    print(f"\n📂 Contagem parcial do nó '{node}' — leitura dos arquivos .txt")
+    try:
+        partial = count_directory(layout, directory, node, detector, rejected)
+    except FileNotFoundError as e:
+        print(f"\n❌ Erro: {e}")
+        sys.exit(1)
+
+    if output is None:
+        output = Path(f"parcial-{node}.json.gz")
+
+    save_partial(partial, output)
+    summary(partial.counts)
+    if rejected:
+        distinct = f"~{rejected.distinct}" if rejected.approximate else rejected.distinct
+        print(f"  ❌ Linhas rejeitadas: {rejected.total} ({distinct} únicas)")
+    print(f"  💾 Contagem parcial salva: {output}")
+    if detector is not None:
+        print_bursts(detector)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+
     # Se pediu setup, executa e sai
-    if "--setup" in sys.argv:
+    if args.setup:
         run_setup()
         return
 
+    # Configuração não-interativa de layouts
+    if args.command == "layout":
+        sys.exit(run_layout_command(args))
+
+    # Serviço HTTP/JSON com a sessão carregada
+    if args.command == "serve":
+        _run_server(args)
+        return
+
     # Caso contrário, executa o processamento normal
     config = load_config(CONFIG_PATH)
     layout = config.active
@@ -68,40 +371,120 @@ def main() -> None:
     print("  Consolidação de Inventário")
     print("=" * 60)
 
-    # ── Etapa 1: Leitura dos arquivos .txt ──────────────────────────────
-    print("\n📂 Etapa 1 — Leitura dos arquivos .txt")
-    try:
-        read_result = read_all_barcodes(layout)
-    except FileNotFoundError as e:
-        print(f"\n❌ Erro: {e}")
-        sys.exit(1)
+    _check_mode_flags(args)
+    detector = _make_detector(args)
+    rejected = _make_rejected(args)
+
+    if args.count_only is not None:
+        _run_count_only(layout, args.count_only, args.output, args.node, detector, rejected)
+        return
+
+    provenance = Provenance() if args.provenance else None
+    indexed: IndexedWorkbook | None = None
+
+    if args.merge:
+        # ── Etapas 1 e 2: combinação das contagens parciais ─────────────
+        print(f"\n🧩 Etapas 1 e 2 — Combinação de {len(args.merge)} contagem(ns) parcial(is)")
+        try:
+            partial = merge_partials(load_partial(path) for path in args.merge)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"\n❌ Erro: {e}")
+            sys.exit(1)
+
+        if (partial.barcode_prefix, partial.barcode_suffix) != (layout.barcode_prefix, layout.barcode_suffix):
+            print("  ⚠️  O filtro de barcode das parciais difere do layout ativo.")
+
+        for node, files in sorted(Counter(f.node for f in partial.files).items()):
+            print(f"  🖥️  {node}: {files} arquivo(s)")
+
+        counted = partial.counts
+        # Preserva o estado aproximado (erro máximo e HyperLogLog) das parciais
+        rejected.merge(partial.rejected_lines(limit=None))
+        if not counted:
+            print("\n⚠️  Nenhum barcode válido nas contagens parciais. Encerrando.")
+            sys.exit(0)
+        summary(counted)
+    elif args.pipeline:
+        # ── Etapas 1 e 2 em paralelo com a carga da planilha ────────────
+        print("\n⚡ Etapas 1 e 2 — Leitura e contabilização (planilha carregando em paralelo)")
+        try:
+            pipeline = run_pipelined(
+                layout, provenance=provenance, detector=detector, rejected=rejected,
+            )
+        except FileNotFoundError as e:
+            print(f"\n❌ Erro: {e}")
+            sys.exit(1)
 
-    if not read_result.barcodes:
-        print("\n⚠️  Nenhum barcode válido encontrado nos arquivos. Encerrando.")
-        sys.exit(0)
+        # Os acumuladores foram preenchidos no processo de leitura
+        counted, indexed, rejected = pipeline.counted, pipeline.indexed, pipeline.rejected
+        provenance, detector = pipeline.provenance, pipeline.anomalies
+        if not counted:
+            print("\n⚠️  Nenhum barcode válido encontrado nos arquivos. Encerrando.")
+            sys.exit(0)
 
-    # ── Etapa 2: Contabilização ─────────────────────────────────────────
-    print("\n🔄 Etapa 2 — Contabilização dos barcodes")
-    counted = count_barcodes(read_result.barcodes)
-    summary(counted)
+        summary(counted)
+        print_timings(pipeline)
+    else:
+        # ── Etapa 1: Leitura dos arquivos .txt ──────────────────────────
+        print("\n📂 Etapa 1 — Leitura dos arquivos .txt")
+        try:
+            read_result = read_all_barcodes(
+                layout, provenance=provenance, detector=detector, rejected=rejected,
+            )
+        except FileNotFoundError as e:
+            print(f"\n❌ Erro: {e}")
+            sys.exit(1)
+
+        if not read_result.barcodes:
+            print("\n⚠️  Nenhum barcode válido encontrado nos arquivos. Encerrando.")
+            sys.exit(0)
+
+        # ── Etapa 2: Contabilização ─────────────────────────────────────
+        print("\n🔄 Etapa 2 — Contabilização dos barcodes")
+        counted = count_barcodes(read_result.barcodes)
+        summary(counted)
 
     # ── Etapa 3: Atribuição na planilha ─────────────────────────────────
     print("\n📊 Etapa 3 — Atribuição de saldos na planilha")
-    try:
-        result = assign_balances(layout, counted)
-    except FileNotFoundError as e:
-        print(f"\n❌ Erro: {e}")
-        sys.exit(1)
+    if indexed is None:
+        try:
+            indexed = load_indexed_workbook(layout)
+        except FileNotFoundError as e:
+            print(f"\n❌ Erro: {e}")
+            sys.exit(1)
+
+    result = assign_balances(
+        layout, counted,
+        wb=indexed.wb, save_path=indexed.path,
+        barcode_index=indexed.index,
+    )
+
+    # ── Conciliação: saldo do sistema x contado ─────────────────────────
+    if indexed.stock is not None:
+        print("\n⚖️  Conciliação — saldo do sistema x contado")
+        report = reconcile(indexed.stock, counted, indexed.index, top_n=args.top)
+        print_reconciliation(report)
 
     # ── Resumo final ────────────────────────────────────────────────────
     # ── Etapa 4: Relatório de códigos não identificados ──────────
-    _print_unmatched_report(read_result, result["not_found"], counted)
+    _print_unmatched_report(
+        rejected, result["not_found"], counted, provenance,
+        page=args.rejected_page, page_size=args.rejected_page_size,
+    )
+    if args.rejected_report is not None and rejected:
+        write_rejected_report(rejected, args.rejected_report)
+        print(f"  💾 Relatório de linhas rejeitadas salvo: {args.rejected_report}\n")
+
+    if detector is not None:
+        print_bursts(detector)
 
     print("=" * 60)
     print("  ✅ Processo concluído com sucesso!")
-    if result["not_found"] or read_result.rejected:
-        total = len(result["not_found"]) + len(set(read_result.rejected))
+    if result["not_found"] or rejected:
+        total = len(result["not_found"]) + rejected.distinct
         print(f"  ⚠️  {total} código(s) não identificado(s) — veja o relatório acima")
+    if detector is not None and detector.bursts:
+        print(f"  ⚠️  {len(detector.bursts)} sequência(s) suspeita(s) de leituras repetidas — veja acima")
     print("=" * 60)
 
 
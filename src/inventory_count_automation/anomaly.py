@@ -0,0 +1,153 @@
+from pathlib import Path
+import dataclasses
+
+# Tamanho mínimo de uma sequência de leituras idênticas para ser considerada suspeita
+DEFAULT_BURST_THRESHOLD = 100
+
+
+@dataclasses.dataclass(frozen=True)
+class Burst:
+    """Sequência suspeita de leituras idênticas consecutivas (ex.: gatilho travado)."""
+    file: str
+    barcode: str
+    start_read: int  # posição (1-based) da primeira leitura entre as leituras válidas do arquivo
+    length: int      # leituras na sequência
+    kept: int        # leituras efetivamente contabilizadas (< length se houve corte)
+
+
+@dataclasses.dataclass(frozen=True)
+class FileScanStats:
+    """Estatísticas de um arquivo lido."""
+    file: str
+    barcodes: int        # leituras válidas (antes do corte)
+    bursts: int
+    burst_reads: int     # leituras dentro de sequências suspeitas
+    max_burst: int
+    repeat_rate: float   # fração das amostras iguais à amostra anterior
+
+    @property
+    def burst_rate(self) -> float:
+        """Fração das leituras válidas que estão em sequências suspeitas."""
+        return self.burst_reads / self.barcodes if self.barcodes else 0.0
+
+
+@dataclasses.dataclass
+class BurstDetector:
+    """
+    Detector de rajadas de leituras idênticas (ex.: gatilho do coletor travado).
+
+    Em vez de acompanhar cada leitura, compara apenas leituras amostradas a
+    cada ``threshold // 2`` posições: toda sequência com ``threshold`` ou mais
+    leituras iguais contém obrigatoriamente duas amostras consecutivas iguais,
+    e só ao redor dessas amostras a sequência é medida com exatidão. O custo
+    fica em ~2/threshold comparações por leitura e a memória é constante por
+    arquivo.
+
+    Sequências suspeitas são registradas em ``bursts``; se ``cap`` for
+    informado, apenas as ``cap`` primeiras leituras de cada uma são mantidas.
+    """
+    threshold: int = DEFAULT_BURST_THRESHOLD
+    cap: int | None = None
+    bursts: list[Burst] = dataclasses.field(default_factory=list)
+    stats: list[FileScanStats] = dataclasses.field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.threshold < 2:
+            raise ValueError("threshold (tamanho mínimo da sequência suspeita) deve ser maior ou igual a 2.")
+        if self.cap is not None and self.cap < 1:
+            raise ValueError("cap (leituras mantidas por sequência) deve ser maior ou igual a 1.")
+
+    def scan(self, filepath: Path, barcodes: list[str]) -> list[tuple[int, int]]:
+        """
+        Procura sequências suspeitas nas leituras válidas de um arquivo, na
+        ordem em que foram lidas. Com ``cap``, remove de ``barcodes`` (no
+        próprio objeto) as leituras excedentes de cada sequência.
+
+        Retorna os intervalos [início, fim) removidos, em posições da lista
+        original e em ordem crescente, para que dados paralelos às leituras
+        (ex.: linha e offset de origem) sejam cortados da mesma forma.
+        """
+        n = len(barcodes)
+        stride = self.threshold // 2
+        found: list[tuple[int, int]] = []   # (início, fim) inclusivos
+        samples = repeats = 0
+
+        pos = 0
+        while pos + stride < n:
+            samples += 1
+            value = barcodes[pos]
+            if value != barcodes[pos + stride]:
+                pos += stride
+                continue
+
+            repeats += 1
+            start = pos
+            while start > 0 and barcodes[start - 1] == value:
+                start -= 1
+            end = pos
+            while end + 1 < n and barcodes[end + 1] == value:
+                end += 1
+
+            if end - start + 1 >= self.threshold:
+                found.append((start, end))
+            # Próxima amostra alinhada após o fim da sequência
+            pos = (end // stride + 1) * stride
+
+        name = str(filepath)
+        for start, end in found:
+            length = end - start + 1
+            kept = min(length, self.cap) if self.cap is not None else length
+            self.bursts.append(Burst(name, barcodes[start], start + 1, length, kept))
+
+        burst_lengths = [end - start + 1 for start, end in found]
+        self.stats.append(FileScanStats(
+            file=name,
+            barcodes=n,
+            bursts=len(found),
+            burst_reads=sum(burst_lengths),
+            max_burst=max(burst_lengths, default=0),
+            repeat_rate=repeats / samples if samples else 0.0,
+        ))
+
+        if self.cap is None:
+            return []
+
+        removed = [(start + self.cap, end + 1) for start, end in found if end + 1 > start + self.cap]
+        # De trás para frente, para que os índices anteriores continuem válidos
+        for start, stop in reversed(removed):
+            del barcodes[start:stop]
+        return removed
+
+    @property
+    def discarded(self) -> int:
+        """Total de leituras descartadas pelo corte."""
+        return sum(b.length - b.kept for b in self.bursts)
+
+
+def print_bursts(detector: BurstDetector) -> None:
+    """Imprime as sequências suspeitas encontradas na leitura."""
+    if not detector.bursts:
+        return
+
+    action = f"limitadas a {detector.cap} leituras" if detector.cap is not None else "contabilizadas integralmente"
+    print(
+        f"\n  🔁 Sequências suspeitas de leituras idênticas "
+        f"({len(detector.bursts)}, ≥ {detector.threshold} seguidas, {action}):"
+    )
+    for burst in detector.bursts:
+        line = f"     • {burst.barcode} × {burst.length}  ← {Path(burst.file).name}, leitura {burst.start_read}"
+        if burst.kept != burst.length:
+            line += f" (mantidas {burst.kept})"
+        print(line)
+
+    print("     Por arquivo:")
+    for stats in detector.stats:
+        if stats.bursts:
+            print(
+                f"     📄 {Path(stats.file).name}: {stats.burst_rate:.1%} das {stats.barcodes} leituras "
+                f"em {stats.bursts} sequência(s) (maior: {stats.max_burst}); "
+                f"{stats.repeat_rate:.1%} das amostras repetidas"
+            )
+
+    if detector.discarded:
+        print(f"     {detector.discarded} leitura(s) descartada(s) pelo corte.")
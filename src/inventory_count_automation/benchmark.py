@@ -0,0 +1,181 @@
+"""
+Benchmark com dados sintéticos.
+
+Gera arquivos de contagem e uma planilha artificiais e mede tempo e memória
+de cada etapa. Uso:
+
+    python -m inventory_count_automation.benchmark --lines 1000000 --rows 100000
+"""
+
+from pathlib import Path
+import argparse
+import contextlib
+import dataclasses
+import io
+import random
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.counter import count_barcodes
+from inventory_count_automation.excel_handler import load_indexed_workbook
+from inventory_count_automation.reader import read_all_barcodes
+from inventory_count_automation.table import BarcodeTable
+from inventory_count_automation.anomaly import BurstDetector
+
+BENCH_PREFIX = "MCS000"
+
+# Layout usado pelos dados gerados: barcode na coluna A, saldo na coluna B
+BENCH_LAYOUT = LayoutConfig(
+    description="benchmark",
+    planilha_filename="benchmark.xlsx",
+    header_row=1,
+    data_start_row=2,
+    col_chave_busca="A",
+    col_qtd_fisico="B",
+    barcode_prefix=BENCH_PREFIX,
+)
+
+
+@dataclasses.dataclass
+class Measurement:
+    """Tempo e memória de uma etapa."""
+    name: str
+    seconds: float
+    peak_bytes: int       # pico de alocação durante a etapa
+    retained_bytes: int   # memória ainda alocada ao final (estruturas mantidas)
+
+
+def sku(i: int) -> str:
+    """Barcode sintético do produto ``i``."""
+    return f"{BENCH_PREFIX}PROD{i:07d}"
+
+
+def generate_scan_files(
+    directory: Path,
+    lines: int,
+    files: int = 4,
+    distinct: int = 50_000,
+    seed: int = 42,
+) -> list[Path]:
+    """
+    Gera ``files`` arquivos .txt somando ``lines`` leituras de ``distinct``
+    produtos, sorteados com distribuição uniforme.
+    """
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    per_file, extra = divmod(lines, files)
+    paths: list[Path] = []
+
+    for n in range(files):
+        path = directory / f"coletor_{n + 1:02d}.txt"
+        count = per_file + (1 if n < extra else 0)
+        with path.open("w", encoding="utf-8") as f:
+            f.writelines(f"{sku(rng.randrange(distinct))}\n" for _ in range(count))
+        paths.append(path)
+
+    return paths
+
+
+def generate_workbook(path: Path, rows: int) -> Path:
+    """Gera uma planilha com ``rows`` produtos no layout ``BENCH_LAYOUT``."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["Barcode", "QTD Físico"])
+    for i in range(rows):
+        ws.append([sku(i), None])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
+
+
+def measure(name: str, fn, *args, repeat: int = 1, **kwargs) -> tuple[object, Measurement]:
+    """
+    Executa ``fn`` para medir o tempo (melhor de ``repeat`` execuções, sem
+    instrumentação) e mais uma vez sob ``tracemalloc`` para pico e memória
+    retida pelo resultado. A saída das etapas (logs por arquivo etc.) é descartada.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(*args, **kwargs)
+            seconds = min(seconds, time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            value = fn(*args, **kwargs)
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return value, Measurement(name, seconds, peak, retained)
+
+
+def _read_count_index(directory: Path, planilha: Path, table: BarcodeTable | None):
+    """Leitura + contagem + indexação, mantendo todas as estruturas vivas."""
+    read_result = read_all_barcodes(BENCH_LAYOUT, directory, table=table)
+    counted = count_barcodes(read_result.barcodes, table)
+    indexed = load_indexed_workbook(BENCH_LAYOUT, planilha, table)
+    return read_result, counted, indexed.index, table
+
+
+def run_benchmark(workdir: Path, lines: int, rows: int, files: int = 4) -> list[Measurement]:
+    """Gera os dados em ``workdir`` e mede cada cenário."""
+    txt_dir = workdir / "txt"
+    planilha = workdir / "benchmark.xlsx"
+    generate_scan_files(txt_dir, lines, files=files, distinct=rows)
+    generate_workbook(planilha, rows)
+
+    results: list[Measurement] = []
+    _, m = measure("Leitura dos .txt", read_all_barcodes, BENCH_LAYOUT, txt_dir, repeat=5)
+    results.append(m)
+    _, m = measure(
+        "Leitura dos .txt (detector de rajadas)",
+        lambda: read_all_barcodes(BENCH_LAYOUT, txt_dir, detector=BurstDetector()),
+        repeat=5,
+    )
+    results.append(m)
+    _, m = measure("Carga e indexação da planilha", load_indexed_workbook, BENCH_LAYOUT, planilha)
+    results.append(m)
+    _, m = measure(
+        "Leitura + contagem + índice (sem tabela)", _read_count_index, txt_dir, planilha, None,
+    )
+    results.append(m)
+    _, m = measure(
+        "Leitura + contagem + índice (BarcodeTable)",
+        lambda: _read_count_index(txt_dir, planilha, BarcodeTable()),
+    )
+    results.append(m)
+    return results
+
+
+def print_report(results: list[Measurement]) -> None:
+    print(f"  {'Etapa':<45} {'Tempo':>9} {'Pico':>11} {'Retido':>11}")
+    for m in results:
+        print(
+            f"  {m.name:<45} {m.seconds:>8.2f}s "
+            f"{m.peak_bytes / 2**20:>8.1f}MiB {m.retained_bytes / 2**20:>8.1f}MiB"
+        )
+
+    plain, detected = results[0].seconds, results[1].seconds
+    print(f"\n  🔁 Overhead do detector de rajadas na leitura: {(detected - plain) / plain:+.1%}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark com dados sintéticos.")
+    parser.add_argument("--lines", type=int, default=200_000, help="total de leituras geradas")
+    parser.add_argument("--rows", type=int, default=20_000, help="produtos na planilha")
+    parser.add_argument("--files", type=int, default=4, help="quantidade de arquivos .txt")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"  🧪 {args.lines} leituras em {args.files} arquivos, {args.rows} produtos na planilha\n")
+        print_report(run_benchmark(Path(tmp), args.lines, args.rows, args.files))
+
+
+if __name__ == "__main__":
+    main()
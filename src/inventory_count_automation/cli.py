@@ -1,3 +1,11 @@
+from pathlib import Path
+import argparse
+import dataclasses
+
+import tomli_w
+
+from inventory_count_automation import config_api
+from inventory_count_automation.config_api import LAYOUT_FIELDS
 from inventory_count_automation.settings import (
     LayoutConfig,
     AppConfig,
@@ -111,6 +119,16 @@ def _prompt_layout_fields(base: LayoutConfig | None = None) -> LayoutConfig:
         col_descricao = base.col_descricao
         col_sku = base.col_sku
 
+    # ── Conciliação (opcional) ───────────────────────────
+    configurar_conciliacao = input("\n  Configurar conciliação com o saldo do sistema? [s/N]: ").strip().lower()
+
+    if configurar_conciliacao == "s":
+        col_qtd_sistema = input(f"  Coluna saldo do sistema [{base.col_qtd_sistema or 'vazio'}]: ").strip().upper() or base.col_qtd_sistema
+        col_custo_unitario = input(f"  Coluna custo unitário [{base.col_custo_unitario or 'vazio'}]: ").strip().upper() or base.col_custo_unitario
+    else:
+        col_qtd_sistema = base.col_qtd_sistema
+        col_custo_unitario = base.col_custo_unitario
+
     # ── Cria e retorna o LayoutConfig ────────────────────
     # Se os dados forem inválidos, o __post_init__ vai lançar ValueError
     return LayoutConfig(
@@ -125,6 +143,8 @@ def _prompt_layout_fields(base: LayoutConfig | None = None) -> LayoutConfig:
         col_cod_xml=col_cod_xml,
         col_descricao=col_descricao,
         col_sku=col_sku,
+        col_qtd_sistema=col_qtd_sistema,
+        col_custo_unitario=col_custo_unitario,
         barcode_prefix=barcode_prefix,
         barcode_suffix=barcode_suffix,
     )
@@ -200,3 +220,131 @@ def _choose_layout(config: AppConfig, action: str) -> str | None:
     except (ValueError, IndexError):
         print("  ❌ Opção inválida.")
         return None
+
+# ── Modo não-interativo (inventory-count layout ...) ─────
+
+def add_layout_arguments(parser: argparse.ArgumentParser) -> None:
+    """Registra os subcomandos de ``inventory-count layout``."""
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=CONFIG_PATH,
+        metavar="ARQUIVO",
+        help=f"arquivo de configuração (padrão: {CONFIG_PATH})",
+    )
+    actions = parser.add_subparsers(dest="action", required=True, metavar="AÇÃO")
+
+    actions.add_parser("list", help="lista os layouts")
+
+    show = actions.add_parser("show", help="exibe um layout em TOML")
+    show.add_argument("name", metavar="NOME")
+
+    for action, help_text in (("add", "adiciona um layout"), ("edit", "altera campos de um layout")):
+        sub = actions.add_parser(action, help=help_text)
+        sub.add_argument("name", metavar="NOME")
+        sub.add_argument(
+            "--from-file",
+            type=Path,
+            metavar="ARQUIVO",
+            help="campos do layout em JSON/TOML (as opções abaixo têm precedência)",
+        )
+        sub.add_argument("--activate", action="store_true", help="torna o layout ativo")
+        # Uma opção por campo do LayoutConfig (ex.: --col-chave-busca H)
+        for field, field_type in LAYOUT_FIELDS.items():
+            sub.add_argument(
+                f"--{field.replace('_', '-')}",
+                dest=field,
+                type=field_type,
+                default=argparse.SUPPRESS,
+                metavar="VALOR",
+            )
+
+    remove = actions.add_parser("remove", help="remove um layout")
+    remove.add_argument("name", metavar="NOME")
+
+    activate = actions.add_parser("activate", help="define o layout ativo")
+    activate.add_argument("name", metavar="NOME")
+
+    validate = actions.add_parser(
+        "validate",
+        help="valida a configuração atual ou, se informado, um patch (sem gravar)",
+    )
+    validate.add_argument("patch", type=Path, nargs="?", metavar="ARQUIVO")
+    validate.add_argument("--replace", action="store_true", help="como em import")
+
+    import_ = actions.add_parser(
+        "import",
+        help="aplica um patch JSON/TOML com vários layouts (tudo ou nada)",
+    )
+    import_.add_argument("patch", type=Path, metavar="ARQUIVO")
+    import_.add_argument(
+        "--replace",
+        action="store_true",
+        help="recria os layouts do patch a partir dos padrões em vez de alterar só os campos informados",
+    )
+
+
+def run_layout_command(args: argparse.Namespace) -> int:
+    """
+    Executa um subcomando de ``inventory-count layout`` e retorna o código de
+    saída (0 = sucesso). A configuração é gravada uma única vez, ao final, e
+    somente se a operação inteira for válida.
+    """
+    path: Path = args.config
+    try:
+        config = load_config(path)
+
+        if args.action == "list":
+            for name, layout in config.layouts.items():
+                marker = " (ativo)" if name == config.active_layout else ""
+                desc = f" — {layout.description}" if layout.description else ""
+                print(f"{name}{marker}{desc}")
+            return 0
+
+        if args.action == "show":
+            if args.name not in config.layouts:
+                raise KeyError(f"Layout '{args.name}' não encontrado.")
+            print(tomli_w.dumps(dataclasses.asdict(config.layouts[args.name])), end="")
+            return 0
+
+        if args.action == "validate":
+            if args.patch is not None:
+                config = config_api.apply_patch(config, config_api.load_patch(args.patch), args.replace)
+            errors = config_api.validate_config(config)
+            if errors:
+                raise config_api.ConfigPatchError(errors)
+            print(f"✅ Configuração válida ({len(config.layouts)} layout(s)).")
+            return 0
+
+        if args.action == "import":
+            config = config_api.import_patch(args.patch, path, replace=args.replace)
+            print(f"✅ Patch aplicado: {len(config.layouts)} layout(s), ativo '{config.active_layout}'.")
+            return 0
+
+        if args.action in ("add", "edit"):
+            fields = config_api.load_patch(args.from_file) if args.from_file is not None else {}
+            fields.update({f: getattr(args, f) for f in LAYOUT_FIELDS if hasattr(args, f)})
+            if args.action == "add":
+                config_api.add_layout(config, args.name, fields)
+            else:
+                config_api.edit_layout(config, args.name, fields)
+            if args.activate:
+                config.set_active(args.name)
+        elif args.action == "remove":
+            config.remove_layout(args.name)
+        elif args.action == "activate":
+            config.set_active(args.name)
+
+        save_config(config, path)
+        print(f"✅ Layout '{args.name}': {args.action} concluído.")
+        return 0
+
+    except config_api.ConfigPatchError as e:
+        print(f"❌ {len(e.errors)} erro(s) de validação:")
+        for error in e.errors:
+            print(f"   • {error}")
+    except KeyError as e:
+        print(f"❌ Erro: {e.args[0]}")
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ Erro: {e}")
+    return 1
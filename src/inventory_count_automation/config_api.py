@@ -0,0 +1,193 @@
+"""
+API não-interativa de configuração de layouts.
+
+Equivalente programático do setup interativo (``cli.run_setup``): adicionar,
+editar, remover, validar e ativar layouts a partir de dicionários ou de um
+arquivo de patch JSON/TOML, sem ``input()``. Usada pelos subcomandos
+``inventory-count layout ...``.
+"""
+
+from pathlib import Path
+import copy
+import dataclasses
+import json
+import tomllib
+
+from openpyxl.utils import column_index_from_string
+
+from inventory_count_automation.settings import (
+    AppConfig,
+    LayoutConfig,
+    compile_layout,
+    load_config,
+    save_config,
+)
+
+# Campos aceitos em um layout e seus tipos
+LAYOUT_FIELDS: dict[str, type] = {f.name: f.type for f in dataclasses.fields(LayoutConfig)}
+
+# Chaves aceitas em um patch (mesmo formato do config.toml, mais remove_layouts)
+PATCH_KEYS = ("active_layout", "layouts", "remove_layouts")
+
+
+class ConfigPatchError(ValueError):
+    """Erros de validação de um patch; ``errors`` lista todos os problemas encontrados."""
+
+    def __init__(self, errors: list[str]) -> None:
+        self.errors = errors
+        super().__init__("\n".join(errors))
+
+
+def build_layout(fields: dict, base: LayoutConfig | None = None) -> LayoutConfig:
+    """
+    Cria um LayoutConfig a partir de ``fields`` aplicados sobre ``base``
+    (ou sobre os valores padrão).
+
+    Colunas são normalizadas para maiúsculas. Lança ValueError se houver
+    campo desconhecido, tipo inválido, coluna inválida ou se as validações
+    do próprio LayoutConfig falharem.
+    """
+    unknown = sorted(set(fields) - set(LAYOUT_FIELDS))
+    if unknown:
+        raise ValueError(f"Campo(s) desconhecido(s): {', '.join(unknown)}.")
+
+    values = {}
+    for name, value in fields.items():
+        expected = LAYOUT_FIELDS[name]
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError(
+                f"{name} deve ser do tipo {expected.__name__}, recebido {type(value).__name__}."
+            )
+        if name.startswith("col_"):
+            value = value.strip().upper()
+            if value:
+                try:
+                    column_index_from_string(value)
+                except ValueError:
+                    raise ValueError(f"{name}: coluna inválida '{value}' (esperado A até ZZZ).") from None
+        values[name] = value
+
+    layout = dataclasses.replace(base if base is not None else LayoutConfig(), **values)
+    compile_layout(layout)
+    return layout
+
+
+def add_layout(config: AppConfig, name: str, fields: dict) -> LayoutConfig:
+    """Adiciona um layout novo. Lança ValueError se o nome existir ou os campos forem inválidos."""
+    if not name.strip():
+        raise ValueError("Nome do layout não pode ser vazio.")
+    layout = build_layout(fields)
+    config.add_layout(name, layout)
+    return layout
+
+
+def edit_layout(config: AppConfig, name: str, fields: dict) -> LayoutConfig:
+    """Altera apenas os campos informados de um layout existente."""
+    if name not in config.layouts:
+        raise KeyError(f"Layout '{name}' não encontrado.")
+    layout = build_layout(fields, base=config.layouts[name])
+    config.layouts[name] = layout
+    return layout
+
+
+def load_patch(path: Path) -> dict:
+    """Carrega um patch de configuração em JSON (.json) ou TOML (qualquer outra extensão)."""
+    if not path.exists():
+        raise FileNotFoundError(f"Arquivo de patch não encontrado: {path}")
+
+    try:
+        if path.suffix.lower() == ".json":
+            with path.open("r", encoding="utf-8") as f:
+                patch = json.load(f)
+        else:
+            with path.open("rb") as f:
+                patch = tomllib.load(f)
+    except (json.JSONDecodeError, tomllib.TOMLDecodeError) as e:
+        raise ValueError(f"Arquivo de patch inválido: {path} ({e})") from None
+
+    if not isinstance(patch, dict):
+        raise ValueError(f"Arquivo de patch inválido: {path} (esperado um objeto/tabela).")
+    return patch
+
+
+def apply_patch(config: AppConfig, patch: dict, replace: bool = False) -> AppConfig:
+    """
+    Aplica um patch e retorna a nova configuração, sem alterar ``config``.
+
+    O patch tem o mesmo formato do config.toml (``active_layout`` e
+    ``layouts``) e aceita ``remove_layouts`` (lista de nomes). Layouts
+    existentes recebem apenas os campos informados; com ``replace=True``
+    são recriados a partir dos valores padrão.
+
+    Todos os layouts são validados numa única passada: se houver qualquer
+    erro, lança ConfigPatchError com a lista completa e nada é aplicado.
+    """
+    errors: list[str] = []
+    result = copy.deepcopy(config)
+
+    for key in sorted(set(patch) - set(PATCH_KEYS)):
+        errors.append(f"{key}: chave desconhecida no patch.")
+
+    remove = patch.get("remove_layouts", [])
+    if not isinstance(remove, list) or not all(isinstance(name, str) for name in remove):
+        errors.append("remove_layouts: esperada uma lista de nomes de layout.")
+        remove = []
+
+    for name in remove:
+        if name not in result.layouts:
+            errors.append(f"remove_layouts: layout '{name}' não encontrado.")
+        else:
+            del result.layouts[name]
+
+    layouts = patch.get("layouts", {})
+    if not isinstance(layouts, dict):
+        errors.append("layouts: esperado um objeto/tabela {nome: campos}.")
+        layouts = {}
+
+    for name, fields in layouts.items():
+        if not isinstance(fields, dict):
+            errors.append(f"layouts.{name}: esperado um objeto/tabela de campos.")
+            continue
+        base = None if replace else result.layouts.get(name)
+        try:
+            result.layouts[name] = build_layout(fields, base=base)
+        except ValueError as e:
+            errors.append(f"layouts.{name}: {e}")
+
+    active = patch.get("active_layout", result.active_layout)
+    if not isinstance(active, str):
+        errors.append(f"active_layout: esperado o nome de um layout, recebido {type(active).__name__}.")
+    elif active not in result.layouts:
+        errors.append(
+            f"active_layout: layout '{active}' não encontrado. "
+            f"Disponíveis: {list(result.layouts.keys())}"
+        )
+
+    if errors:
+        raise ConfigPatchError(errors)
+
+    result.active_layout = active
+    return result
+
+
+def import_patch(path: Path, config_path: Path, replace: bool = False) -> AppConfig:
+    """
+    Importa um patch em lote: carrega a configuração atual, valida e aplica
+    todos os layouts do patch e grava o config.toml uma única vez.
+    """
+    config = apply_patch(load_config(config_path), load_patch(path), replace=replace)
+    save_config(config, config_path)
+    return config
+
+
+def validate_config(config: AppConfig) -> list[str]:
+    """Valida todos os layouts de uma configuração já carregada e retorna a lista de erros."""
+    errors: list[str] = []
+    for name, layout in config.layouts.items():
+        try:
+            build_layout(dataclasses.asdict(layout))
+        except ValueError as e:
+            errors.append(f"layouts.{name}: {e}")
+    if config.active_layout not in config.layouts:
+        errors.append(f"active_layout: layout '{config.active_layout}' não encontrado.")
+    return errors
@@ -1,12 +1,20 @@
 from collections import Counter
 
+from inventory_count_automation.table import BarcodeTable
 
-def count_barcodes(barcodes: list[str]) -> dict[str, int]:
+
+def count_barcodes(barcodes: list[str], table: BarcodeTable | None = None) -> dict[str, int]:
     """
     Recebe uma lista de barcodes (com repetições) e retorna um dicionário
     {barcode: quantidade} ordenado por barcode.
+
+    Se ``table`` for informada (opcional: tem custo por leitura), as
+    quantidades também são acumuladas nela.
     """
     counter = Counter(barcodes)
+    if table is not None:
+        for barcode, qty in counter.items():
+            table.add_qty(barcode, qty)
     return dict(sorted(counter.items()))
 
 
@@ -1,25 +1,75 @@
+from itertools import repeat
 from pathlib import Path
+import dataclasses
 import openpyxl
 
-from inventory_count_automation.settings import LayoutConfig, INPUT_PLANILHA_DIR
-
-def _build_barcode_index(ws, col_barcode: str, start_row: int) -> dict[str, int]:
+from inventory_count_automation.settings import LayoutConfig, CompiledLayout, INPUT_PLANILHA_DIR
+from inventory_count_automation.table import BarcodeTable, Status
+from inventory_count_automation.reconciliation import ExpectedStock
+
+def _column_values(ws, col: int | None, start_row: int):
+    """Itera os valores de uma coluna a partir de ``start_row`` (None se ``col`` for None)."""
+    if col is None:
+        return repeat(None)
+    return (
+        value
+        for (value,) in ws.iter_rows(
+            min_row=start_row, max_row=ws.max_row, min_col=col, max_col=col, values_only=True,
+        )
+    )
+
+
+def _build_barcode_index(
+    ws,
+    compiled: CompiledLayout,
+    table: BarcodeTable | None = None,
+    stock: ExpectedStock | None = None,
+) -> dict[str, int]:
     """
     Percorre a coluna de barcode da planilha e cria um índice
     {barcode_upper: número_da_linha} para busca O(1).
+
+    Se ``table`` for informada, as chaves são internadas nela e a linha
+    de cada barcode é registrada. Se ``stock`` for informado, o saldo do
+    sistema e o custo unitário de cada linha são lidos na mesma passada.
     """
     index: dict[str, int] = {}
+    normalize = compiled.normalize
+    start_row = compiled.data_start_row
+
+    keys = _column_values(ws, compiled.key_col, start_row)
+    if stock is not None:
+        expected = _column_values(ws, compiled.expected_col, start_row)
+        costs = _column_values(ws, compiled.cost_col, start_row)
+        stock.has_cost = compiled.cost_col is not None
+    else:
+        expected = costs = repeat(None)
 
-    for row in range(start_row, ws.max_row + 1):
-        cell_value = ws[f"{col_barcode}{row}"].value
+    for row, cell_value, expected_qty, unit_cost in zip(
+        range(start_row, ws.max_row + 1), keys, expected, costs,
+    ):
         if cell_value is not None:
-            barcode = str(cell_value).strip().upper()
+            barcode = normalize(cell_value)
             if barcode:
+                if table is not None:
+                    barcode = table.intern(barcode)
+                    table.set_row(barcode, row)
                 index[barcode] = row
+                if stock is not None:
+                    stock.add(barcode, row, expected_qty, unit_cost)
 
     return index
 
 
+@dataclasses.dataclass
+class IndexedWorkbook:
+    """Planilha carregada junto com o índice {barcode: linha} da coluna de busca."""
+    wb: openpyxl.Workbook
+    path: Path
+    index: dict[str, int]
+    stock: ExpectedStock | None = None   # preenchido se o layout tiver col_qtd_sistema
+
+
 def _default_planilha_path(layout: LayoutConfig) -> Path:
     """Retorna o caminho padrão da planilha base."""
     return INPUT_PLANILHA_DIR / layout.planilha_filename
@@ -36,11 +86,81 @@ def load_workbook(layout: LayoutConfig, filepath: Path | None = None) -> tuple[o
     return openpyxl.load_workbook(filepath), filepath
 
 
+def load_indexed_workbook(
+    layout: LayoutConfig,
+    filepath: Path | None = None,
+    table: BarcodeTable | None = None,
+) -> IndexedWorkbook:
+    """
+    Carrega a planilha e já constrói o índice de barcodes.
+
+    Não depende da leitura dos .txt, portanto pode ser executada em paralelo
+    com ela (ver ``pipeline``). Se o layout tiver coluna de saldo do sistema
+    (``col_qtd_sistema``), os dados da conciliação são lidos na mesma passada.
+    """
+    wb, path = load_workbook(layout, filepath)
+    ws = wb.active
+    if ws is None:
+        raise ValueError("Workbook não possui uma planilha ativa")
+
+    compiled = layout.compiled
+    stock = ExpectedStock() if compiled.expected_col is not None else None
+    index = _build_barcode_index(ws, compiled, table, stock)
+    return IndexedWorkbook(wb=wb, path=path, index=index, stock=stock)
+
+
+def write_balances(
+    ws,
+    layout: LayoutConfig,
+    counted: dict[str, int],
+    barcode_index: dict[str, int],
+    table: BarcodeTable | None = None,
+    clear_uncounted: bool = False,
+) -> dict[str, list[str]]:
+    """
+    Escreve as quantidades contadas nas células da planilha em memória,
+    sem salvar nem imprimir nada. Retorna {"matched", "not_found"} como
+    ``assign_balances``.
+
+    Com ``clear_uncounted``, a quantidade das linhas do índice que não
+    foram contadas é apagada, para que uma nova escrita na mesma planilha
+    (ex.: após zerar a sessão) não mantenha saldos da escrita anterior.
+    """
+    matched: list[str] = []
+    not_found: list[str] = []
+    qty_col = layout.compiled.qty_col
+
+    if clear_uncounted:
+        for barcode in barcode_index.keys() - counted.keys():
+            # ws.cell(..., value=None) não altera a célula: a atribuição precisa ser explícita
+            ws.cell(row=barcode_index[barcode], column=qty_col).value = None
+
+    for barcode, qty in counted.items():
+        row = barcode_index.get(barcode)
+        if row is not None:
+            ws.cell(row=row, column=qty_col, value=qty)
+            matched.append(barcode)
+        else:
+            not_found.append(barcode)
+
+    if table is not None:
+        for barcode in matched:
+            table.set_status(barcode, Status.MATCHED)
+        for barcode in not_found:
+            table.set_status(barcode, Status.NOT_FOUND)
+        for barcode in barcode_index.keys() - counted.keys():
+            table.set_status(barcode, Status.UNCOUNTED)
+
+    return {"matched": matched, "not_found": not_found}
+
+
 def assign_balances(
     layout: LayoutConfig,
     counted: dict[str, int],
     wb: openpyxl.Workbook | None = None,
     save_path: Path | None = None,
+    barcode_index: dict[str, int] | None = None,
+    table: BarcodeTable | None = None,
 ) -> dict[str, list[str]]:
     """
     Atribui os saldos contados diretamente na planilha original.
@@ -53,6 +173,11 @@ def assign_balances(
         Workbook já carregado; se None, carrega do caminho padrão.
     save_path : Path, opcional
         Caminho onde salvar; se None, salva no próprio arquivo original.
+    barcode_index : dict[str, int], opcional
+        Índice {barcode: linha} já construído para ``wb``; se None, é
+        construído aqui.
+    table : BarcodeTable, opcional
+        Tabela compartilhada onde o status de cada barcode é registrado.
 
     Retorna
     -------
@@ -73,18 +198,11 @@ def assign_balances(
         save_path = original_path
 
     # Indexa barcode → linha da planilha
-    barcode_index = _build_barcode_index(ws, layout.col_chave_busca, layout.data_start_row)
-
-    matched: list[str] = []
-    not_found: list[str] = []
+    if barcode_index is None:
+        barcode_index = _build_barcode_index(ws, layout.compiled, table)
 
-    for barcode, qty in counted.items():
-        row = barcode_index.get(barcode)
-        if row is not None:
-            ws[f"{layout.col_qtd_fisico}{row}"] = qty
-            matched.append(barcode)
-        else:
-            not_found.append(barcode)
+    result = write_balances(ws, layout, counted, barcode_index, table)
+    matched, not_found = result["matched"], result["not_found"]
 
     wb.save(save_path)
 
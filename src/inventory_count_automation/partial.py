@@ -0,0 +1,206 @@
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+import base64
+import dataclasses
+import gzip
+import json
+import socket
+
+from inventory_count_automation.settings import LayoutConfig, INPUT_TXT_DIR
+from inventory_count_automation.reader import list_txt_files, parse_barcodes_from_file
+from inventory_count_automation.anomaly import BurstDetector
+from inventory_count_automation.rejected import RejectedLines, DEFAULT_REJECTED_LIMIT
+
+# Identificação do formato do arquivo de contagem parcial
+PARTIAL_FORMAT = "inventory-count-partial"
+PARTIAL_VERSION = 2
+
+
+@dataclasses.dataclass(frozen=True)
+class FileSummary:
+    """Resumo de origem: um arquivo .txt lido em um nó."""
+    node: str
+    path: str
+    barcodes: int
+    rejected: int
+
+
+@dataclasses.dataclass
+class PartialCount:
+    """
+    Contagem parcial de um nó (ex.: um servidor por prédio do armazém).
+
+    Contém apenas os totais {barcode: quantidade}, as linhas rejeitadas
+    agregadas e um resumo por arquivo de origem — nunca as leituras
+    individuais. Se o limite de linhas distintas foi ultrapassado,
+    ``rejected`` tem só as mais frequentes, e o erro máximo das contagens e
+    os registradores do HyperLogLog (em base64) são guardados para que o
+    estado aproximado sobreviva ao merge. A combinação via ``merge`` é
+    associativa e comutativa, então N parciais podem ser combinadas em
+    qualquer ordem/agrupamento.
+    """
+    barcode_prefix: str
+    barcode_suffix: str
+    counts: dict[str, int] = dataclasses.field(default_factory=dict)
+    rejected: dict[str, int] = dataclasses.field(default_factory=dict)
+    files: list[FileSummary] = dataclasses.field(default_factory=list)
+    rejected_error_bound: int = 0
+    rejected_sketch: str | None = None   # None = contagens de rejeitadas exatas
+
+    def merge(self, other: "PartialCount") -> "PartialCount":
+        """
+        Combina duas parciais. Lança ValueError se o filtro de barcode for
+        diferente ou se algum arquivo (nó, caminho) aparecer nas duas.
+        """
+        if (self.barcode_prefix, self.barcode_suffix) != (other.barcode_prefix, other.barcode_suffix):
+            raise ValueError(
+                "Parciais com filtros de barcode diferentes: "
+                f"({self.barcode_prefix!r}, {self.barcode_suffix!r}) x "
+                f"({other.barcode_prefix!r}, {other.barcode_suffix!r})."
+            )
+
+        duplicated = {(f.node, f.path) for f in self.files} & {(f.node, f.path) for f in other.files}
+        if duplicated:
+            shown = ", ".join(f"{node}:{path}" for node, path in sorted(duplicated))
+            raise ValueError(f"Arquivo(s) presente(s) em mais de uma parcial (seriam contados em dobro): {shown}.")
+
+        counts = Counter(self.counts)
+        counts.update(other.counts)
+        # Sem limite: a compactação fica para quem consome o resultado (ver rejected_lines)
+        rejected = self.rejected_lines(limit=None)
+        rejected.merge(other.rejected_lines(limit=None))
+
+        return PartialCount(
+            barcode_prefix=self.barcode_prefix,
+            barcode_suffix=self.barcode_suffix,
+            counts=dict(sorted(counts.items())),
+            files=sorted(self.files + other.files, key=lambda f: (f.node, f.path)),
+            **_rejected_fields(rejected),
+        )
+
+    def rejected_lines(self, limit: int | None = DEFAULT_REJECTED_LIMIT) -> RejectedLines:
+        """Linhas rejeitadas como ``RejectedLines``, com o estado aproximado, se houver."""
+        sketch = base64.b64decode(self.rejected_sketch, validate=True) if self.rejected_sketch is not None else None
+        return RejectedLines.from_state(self.rejected, self.rejected_total, self.rejected_error_bound, sketch, limit)
+
+    @property
+    def total_units(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def rejected_total(self) -> int:
+        """Total exato de linhas rejeitadas (``rejected`` pode conter só as mais frequentes)."""
+        return sum(f.rejected for f in self.files)
+
+
+def count_directory(
+    layout: LayoutConfig,
+    directory: Path = INPUT_TXT_DIR,
+    node: str | None = None,
+    detector: BurstDetector | None = None,
+    rejected: RejectedLines | None = None,
+) -> PartialCount:
+    """
+    Lê os .txt de ``directory`` e gera a contagem parcial deste nó.
+
+    As quantidades são acumuladas arquivo a arquivo, sem manter a lista
+    completa de leituras em memória. Com ``detector``, as rajadas são
+    verificadas (e cortadas, se configurado) antes de entrar na parcial.
+    As linhas rejeitadas são acumuladas em ``rejected`` (criado se não for
+    informado).
+    """
+    if node is None:
+        node = socket.gethostname()
+    if rejected is None:
+        rejected = RejectedLines()
+
+    counts: Counter[str] = Counter()
+    files: list[FileSummary] = []
+
+    for filepath in list_txt_files(directory):
+        before = rejected.total
+        result = parse_barcodes_from_file(filepath, layout, detector=detector, rejected=rejected)
+        counts.update(result.barcodes)
+        files.append(FileSummary(node, str(filepath), len(result.barcodes), rejected.total - before))
+        print(f"  📄 {filepath.name}: {len(result.barcodes)} barcodes lidos")
+
+    return PartialCount(
+        barcode_prefix=layout.barcode_prefix,
+        barcode_suffix=layout.barcode_suffix,
+        counts=dict(sorted(counts.items())),
+        files=files,
+        **_rejected_fields(rejected),
+    )
+
+
+def _rejected_fields(rejected: RejectedLines) -> dict:
+    """Campos de ``PartialCount`` com o estado das linhas rejeitadas."""
+    sketch = rejected.sketch
+    return {
+        "rejected": dict(sorted(rejected.most_common())),
+        "rejected_error_bound": rejected.error_bound,
+        "rejected_sketch": base64.b64encode(sketch).decode("ascii") if sketch is not None else None,
+    }
+
+
+def merge_partials(partials: Iterable[PartialCount]) -> PartialCount:
+    """Combina N parciais. Lança ValueError se nenhuma for informada."""
+    merged: PartialCount | None = None
+    for partial in partials:
+        merged = partial if merged is None else merged.merge(partial)
+
+    if merged is None:
+        raise ValueError("Nenhuma contagem parcial informada para o merge.")
+    return merged
+
+
+def save_partial(partial: PartialCount, path: Path) -> None:
+    """Salva a parcial em JSON compactado com gzip."""
+    data = {
+        "format": PARTIAL_FORMAT,
+        "version": PARTIAL_VERSION,
+        **dataclasses.asdict(partial),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_partial(path: Path) -> PartialCount:
+    """
+    Carrega uma parcial. Lança ValueError se o arquivo estiver truncado ou
+    incompleto, ou se o formato ou a versão não forem suportados.
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"Contagem parcial não encontrada: {path}")
+
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, EOFError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        # EOFError: arquivo gzip truncado
+        raise ValueError(f"Arquivo de contagem parcial inválido: {path} ({e})") from None
+
+    if not isinstance(data, dict) or data.get("format") != PARTIAL_FORMAT:
+        raise ValueError(f"Arquivo não é uma contagem parcial: {path}")
+    if data.get("version") != PARTIAL_VERSION:
+        raise ValueError(
+            f"Versão {data.get('version')} da contagem parcial não suportada "
+            f"(esperada: {PARTIAL_VERSION}): {path}"
+        )
+
+    try:
+        partial = PartialCount(
+            barcode_prefix=data["barcode_prefix"],
+            barcode_suffix=data["barcode_suffix"],
+            counts=dict(data["counts"]),
+            rejected=dict(data["rejected"]),
+            files=[FileSummary(**f) for f in data["files"]],
+            rejected_error_bound=data["rejected_error_bound"],
+            rejected_sketch=data["rejected_sketch"],
+        )
+        partial.rejected_lines(limit=None)  # valida o sketch
+        return partial
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Contagem parcial incompleta ou corrompida: {path} ({type(e).__name__}: {e})") from None
@@ -0,0 +1,202 @@
+from multiprocessing.connection import Connection
+from pathlib import Path
+import dataclasses
+import multiprocessing
+import os
+import sys
+import time
+
+from inventory_count_automation.settings import LayoutConfig, INPUT_TXT_DIR
+from inventory_count_automation.counter import count_barcodes
+from inventory_count_automation.excel_handler import IndexedWorkbook, load_indexed_workbook
+from inventory_count_automation.reader import read_all_barcodes
+from inventory_count_automation.provenance import Provenance
+from inventory_count_automation.table import BarcodeTable
+from inventory_count_automation.anomaly import BurstDetector
+from inventory_count_automation.rejected import RejectedLines
+
+
+@dataclasses.dataclass
+class StageTiming:
+    """Início e fim de uma etapa, em segundos relativos ao início do pipeline."""
+    name: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclasses.dataclass
+class PipelineResult:
+    """
+    Resultado das etapas executadas em paralelo, prontas para o match.
+
+    ``rejected``, ``provenance`` e ``anomalies`` são os acumuladores
+    preenchidos no processo de leitura (cópias dos que foram informados).
+    """
+    counted: dict[str, int]
+    rejected: RejectedLines
+    indexed: IndexedWorkbook
+    timings: list[StageTiming]
+    wall: float
+    provenance: Provenance | None = None
+    anomalies: BurstDetector | None = None
+
+
+def _timed(name: str, origin: float, fn, *args, **kwargs) -> tuple[object, StageTiming]:
+    """Executa ``fn`` e devolve (resultado, StageTiming) relativo a ``origin``."""
+    start = time.perf_counter() - origin
+    value = fn(*args, **kwargs)
+    end = time.perf_counter() - origin
+    return value, StageTiming(name, start, end)
+
+
+def _read_and_count(
+    layout: LayoutConfig,
+    directory: Path,
+    provenance: Provenance | None,
+    detector: BurstDetector | None,
+    rejected: RejectedLines | None,
+) -> tuple[dict[str, int], RejectedLines, Provenance | None, BurstDetector | None]:
+    """
+    Executada no processo de leitura. Devolve apenas os resultados
+    compactos (contagem e acumuladores), nunca a lista de leituras.
+    """
+    read_result = read_all_barcodes(
+        layout, directory, provenance=provenance, detector=detector, rejected=rejected,
+    )
+    counted = count_barcodes(read_result.barcodes)
+    sys.stdout.flush()  # mensagens por arquivo antes das do processo principal
+    return counted, read_result.rejected, read_result.provenance, read_result.anomalies
+
+
+def _read_worker(conn: Connection, origin: float, read, *args) -> None:
+    """Ponto de entrada do processo de leitura: envia (ok, resultado ou exceção) por ``conn``."""
+    try:
+        result = _timed("Leitura e contabilização dos .txt", origin, read, *args)
+    except BaseException as e:
+        conn.send((False, e))
+    else:
+        conn.send((True, result))
+    finally:
+        conn.close()
+
+
+def run_pipelined(
+    layout: LayoutConfig,
+    directory: Path = INPUT_TXT_DIR,
+    planilha_path: Path | None = None,
+    provenance: Provenance | None = None,
+    table: BarcodeTable | None = None,
+    detector: BurstDetector | None = None,
+    rejected: RejectedLines | None = None,
+) -> PipelineResult:
+    """
+    Lê e contabiliza os .txt num processo separado enquanto a planilha é
+    carregada e indexada no processo principal.
+
+    As duas etapas são CPU-bound em Python puro: em threads, disputariam o
+    GIL e rodariam alternadamente. Em processos distintos rodam de fato ao
+    mesmo tempo, e o tempo total tende a max(leitura, indexação) mais a
+    criação do processo e a transferência da contagem. O Workbook nunca
+    cruza processos; da leitura voltam só a contagem e os acumuladores.
+
+    ``provenance``, ``detector`` e ``rejected`` são copiados para o processo
+    de leitura: os preenchidos voltam em ``PipelineResult``. Uma ``table``
+    recebe o índice da planilha e as quantidades contadas. Com menos de
+    dois núcleos disponíveis, as etapas rodam em sequência no próprio
+    processo. Erros de qualquer uma das etapas (ex.: FileNotFoundError)
+    são propagados.
+    """
+    origin = time.perf_counter()
+    if (os.process_cpu_count() or 1) < 2:
+        # Com um único núcleo não há o que sobrepor: roda em sequência, sem criar processo
+        (counted, rejected, provenance, detector), read_timing = _timed(
+            "Leitura e contabilização dos .txt", origin,
+            _read_and_count, layout, directory, provenance, detector, rejected,
+        )
+        indexed, workbook_timing = _timed(
+            "Carga e indexação da planilha", origin,
+            load_indexed_workbook, layout, planilha_path, table,
+        )
+        return _result(counted, rejected, provenance, detector, indexed, table,
+                       [read_timing, workbook_timing], origin)
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    worker = multiprocessing.Process(
+        target=_read_worker,
+        args=(sender, origin, _read_and_count, layout, directory, provenance, detector, rejected),
+        name="leitura",
+        daemon=True,
+    )
+    worker.start()
+    sender.close()
+    try:
+        indexed, workbook_timing = _timed(
+            "Carga e indexação da planilha", origin,
+            load_indexed_workbook, layout, planilha_path, table,
+        )
+        try:
+            ok, payload = receiver.recv()  # antes do join: o resultado pode não caber no pipe
+        except EOFError:
+            raise RuntimeError(f"O processo de leitura terminou sem resultado (código {worker.exitcode}).") from None
+        if not ok:
+            raise payload
+    except BaseException:
+        # Se a planilha falhar, interrompe a leitura em vez de esperar todos os .txt
+        worker.terminate()
+        raise
+    finally:
+        worker.join()
+        receiver.close()
+
+    (counted, rejected, provenance, detector), read_timing = payload
+
+    return _result(counted, rejected, provenance, detector, indexed, table,
+                   [read_timing, workbook_timing], origin)
+
+
+def _result(
+    counted: dict[str, int],
+    rejected: RejectedLines,
+    provenance: Provenance | None,
+    detector: BurstDetector | None,
+    indexed: IndexedWorkbook,
+    table: BarcodeTable | None,
+    timings: list[StageTiming],
+    origin: float,
+) -> PipelineResult:
+    if table is not None:
+        for barcode, qty in counted.items():
+            table.add_qty(barcode, qty)
+
+    return PipelineResult(
+        counted=counted,
+        rejected=rejected,
+        indexed=indexed,
+        timings=timings,
+        wall=time.perf_counter() - origin,
+        provenance=provenance,
+        anomalies=detector,
+    )
+
+
+def overlap(a: StageTiming, b: StageTiming) -> float:
+    """Tempo (s) em que as duas etapas estiveram em execução simultânea."""
+    return max(0.0, min(a.end, b.end) - max(a.start, b.start))
+
+
+def print_timings(result: PipelineResult) -> None:
+    """Imprime a linha do tempo das etapas e a sobreposição obtida."""
+    for timing in result.timings:
+        print(
+            f"  ⏱️  {timing.name}: {timing.duration:.2f}s "
+            f"({timing.start:.2f}s → {timing.end:.2f}s)"
+        )
+
+    sequential = sum(t.duration for t in result.timings)
+    shared = overlap(*result.timings)
+    print(f"  🔀 Sobreposição entre etapas: {shared:.2f}s")
+    print(f"  🕒 Tempo total: {result.wall:.2f}s (sequencial seria ~{sequential:.2f}s)")
@@ -0,0 +1,75 @@
+from pathlib import Path
+from array import array
+from typing import NamedTuple
+import dataclasses
+
+
+class Occurrence(NamedTuple):
+    """Origem de uma leitura: arquivo, linha (1-based) e offset em bytes."""
+    file: str
+    line: int
+    offset: int
+
+
+@dataclasses.dataclass
+class Provenance:
+    """
+    Índice compacto de origem das leituras.
+
+    Para cada código (barcode válido ou linha rejeitada) guarda as
+    ocorrências como triplas (id_arquivo, linha, offset) num único
+    ``array`` de inteiros sem sinal, sem manter o texto das linhas.
+    O custo por ocorrência é de 24 bytes, independente do tamanho
+    da linha original. Linhas rejeitadas distintas são limitadas (ver
+    ``record_rejected``), para que lixo sem repetição não faça o índice
+    crescer sem limite.
+    """
+    files: list[str] = dataclasses.field(default_factory=list)
+    rejected_keys: int = 0   # linhas rejeitadas distintas registradas
+    _entries: dict[str, array] = dataclasses.field(default_factory=dict, repr=False)
+
+    def register_file(self, filepath: Path) -> int:
+        """Registra um arquivo de origem e retorna seu id."""
+        self.files.append(str(filepath))
+        return len(self.files) - 1
+
+    def record(self, key: str, file_id: int, line: int, offset: int) -> None:
+        """Registra uma ocorrência de ``key``."""
+        entries = self._entries.get(key)
+        if entries is None:
+            entries = self._entries[key] = array("Q")
+        entries.extend((file_id, line, offset))
+
+    def record_rejected(self, key: str, file_id: int, line: int, offset: int, limit: int | None) -> bool:
+        """
+        Registra uma ocorrência da linha rejeitada ``key`` se ela já tiver
+        origem registrada ou se ainda houver espaço para ``limit`` linhas
+        rejeitadas distintas (``None``: sem limite). Retorna se registrou.
+        """
+        if key not in self._entries:
+            if limit is not None and self.rejected_keys >= limit:
+                return False
+            self.rejected_keys += 1
+        self.record(key, file_id, line, offset)
+        return True
+
+    def locate(self, key: str) -> list[Occurrence]:
+        """Retorna todas as ocorrências registradas de ``key``, na ordem de leitura."""
+        entries = self._entries.get(key)
+        if entries is None:
+            return []
+        return [
+            Occurrence(self.files[entries[i]], entries[i + 1], entries[i + 2])
+            for i in range(0, len(entries), 3)
+        ]
+
+    def count(self, key: str) -> int:
+        """Quantidade de ocorrências registradas de ``key``."""
+        entries = self._entries.get(key)
+        return len(entries) // 3 if entries is not None else 0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
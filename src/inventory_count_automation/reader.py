@@ -1,14 +1,21 @@
+from array import array
 from pathlib import Path
 import dataclasses
 
 from inventory_count_automation.settings import LayoutConfig, INPUT_TXT_DIR
+from inventory_count_automation.provenance import Provenance
+from inventory_count_automation.table import BarcodeTable
+from inventory_count_automation.anomaly import BurstDetector
+from inventory_count_automation.rejected import RejectedLines
 
 
 @dataclasses.dataclass
 class ReadResult:
     """Resultado consolidado da leitura de barcodes."""
     barcodes: list[str]
-    rejected: list[str]
+    rejected: RejectedLines
+    provenance: Provenance | None = None
+    anomalies: BurstDetector | None = None
 
 def list_txt_files(directory: Path = INPUT_TXT_DIR) -> list[Path]:
     """Retorna todos os arquivos .txt do diretório informado, ordenados por nome."""
@@ -22,48 +29,150 @@ def list_txt_files(directory: Path = INPUT_TXT_DIR) -> list[Path]:
     return files
 
 
-def parse_barcodes_from_file(filepath: Path, layout: LayoutConfig) -> ReadResult:
+def parse_barcodes_from_file(
+    filepath: Path,
+    layout: LayoutConfig,
+    provenance: Provenance | None = None,
+    table: BarcodeTable | None = None,
+    detector: BurstDetector | None = None,
+    rejected: RejectedLines | None = None,
+) -> ReadResult:
     """
     Lê um arquivo .txt e retorna os barcodes válidos e as linhas rejeitadas.
 
     Cada linha é tratada (strip) e validada contra o padrão corporativo.
     Linhas vazias são ignoradas. Linhas não-vazias que não correspondem
     ao padrão são registradas como rejeitadas.
+
+    Se ``provenance`` for informado, registra também a origem (arquivo,
+    linha e offset em bytes) de cada barcode e de cada linha rejeitada.
+    Se ``table`` for informada, os barcodes são internados nela, de modo
+    que leituras repetidas compartilhem a mesma string. Se ``detector`` for
+    informado, as leituras do arquivo passam pelo detector de rajadas (que
+    pode descartar leituras excedentes, se configurado com corte).
+
+    As linhas rejeitadas são acumuladas em ``rejected`` (criado se não for
+    informado), que mantém memória limitada mesmo com milhões de linhas.
     """
+    if rejected is None:
+        rejected = RejectedLines()
+    if provenance is not None:
+        return _parse_with_provenance(filepath, layout, provenance, table, detector, rejected)
+
     barcodes: list[str] = []
-    rejected: list[str] = []
+    reject = rejected.add
+    validate = layout.compiled.validate
+    intern = table.intern if table is not None else None
 
     with filepath.open("r", encoding="utf-8") as f:
         for line in f:
             raw = line.strip()
             if not raw:
                 continue
-            if layout.compiled_barcode_pattern.match(raw):
-                barcodes.append(raw.upper())
+            if validate(raw):
+                barcode = raw.upper()
+                barcodes.append(intern(barcode) if intern else barcode)
             else:
-                rejected.append(raw)
+                reject(raw)
 
-    return ReadResult(barcodes=barcodes, rejected=rejected)
+    if detector is not None:
+        detector.scan(filepath, barcodes)
 
+    return ReadResult(barcodes=barcodes, rejected=rejected, anomalies=detector)
+
+
+def _parse_with_provenance(
+    filepath: Path,
+    layout: LayoutConfig,
+    provenance: Provenance,
+    table: BarcodeTable | None,
+    detector: BurstDetector | None,
+    rejected: RejectedLines,
+) -> ReadResult:
+    """
+    Variante de ``parse_barcodes_from_file`` que registra a origem de cada linha.
 
-def read_all_barcodes(layout: LayoutConfig, directory: Path = INPUT_TXT_DIR) -> ReadResult:
+    O arquivo é lido em modo binário para que o offset em bytes seja exato.
+    A origem dos barcodes só é registrada depois do detector de rajadas,
+    para que leituras descartadas pelo corte não apareçam no índice. Das
+    linhas rejeitadas, só as mantidas por ``rejected`` têm origem
+    registrada, e no máximo ``rejected.limit`` linhas distintas.
+    """
+    barcodes: list[str] = []
+    lines = array("Q")
+    offsets = array("Q")
+    file_id = provenance.register_file(filepath)
+    validate = layout.compiled.validate
+    intern = table.intern if table is not None else None
+    offset = 0
+
+    with filepath.open("rb") as f:
+        for line_no, line in enumerate(f, start=1):
+            line_offset = offset
+            offset += len(line)
+            raw = line.decode("utf-8").strip()
+            if not raw:
+                continue
+            if validate(raw):
+                barcode = raw.upper()
+                if intern:
+                    barcode = intern(barcode)
+                barcodes.append(barcode)
+                lines.append(line_no)
+                offsets.append(line_offset)
+            else:
+                rejected.add(raw)
+                # Só a origem das linhas que continuam no relatório, até o limite de distintas
+                if raw in rejected:
+                    provenance.record_rejected(raw, file_id, line_no, line_offset, rejected.limit)
+
+    if detector is not None:
+        for start, stop in reversed(detector.scan(filepath, barcodes)):
+            del lines[start:stop]
+            del offsets[start:stop]
+
+    record = provenance.record
+    for barcode, line_no, line_offset in zip(barcodes, lines, offsets):
+        record(barcode, file_id, line_no, line_offset)
+
+    return ReadResult(barcodes=barcodes, rejected=rejected, provenance=provenance, anomalies=detector)
+
+
+def read_all_barcodes(
+    layout: LayoutConfig,
+    directory: Path = INPUT_TXT_DIR,
+    provenance: Provenance | None = None,
+    table: BarcodeTable | None = None,
+    detector: BurstDetector | None = None,
+    rejected: RejectedLines | None = None,
+) -> ReadResult:
     """
     Varre todos os .txt do diretório e retorna o resultado consolidado.
 
-    Retorna um ReadResult com todos os barcodes (com repetições) e
-    todas as linhas rejeitadas para posterior análise.
+    Retorna um ReadResult com todos os barcodes (com repetições) e as
+    linhas rejeitadas de todos os arquivos, acumuladas em ``rejected``
+    (criado se não for informado). Se ``provenance``
+    for informado, o índice de origem é preenchido e anexado ao resultado;
+    se ``table`` for informada, os barcodes são internados nela; se
+    ``detector`` for informado, cada arquivo passa pelo detector de rajadas.
     """
     files = list_txt_files(directory)
     all_barcodes: list[str] = []
-    all_rejected: list[str] = []
+    if rejected is None:
+        rejected = RejectedLines()
 
     for filepath in files:
-        result = parse_barcodes_from_file(filepath, layout)
+        before = rejected.total
+        result = parse_barcodes_from_file(filepath, layout, provenance, table, detector, rejected)
         msg = f"  📄 {filepath.name}: {len(result.barcodes)} barcodes lidos"
-        if result.rejected:
-            msg += f" ({len(result.rejected)} linhas rejeitadas)"
+        if rejected.total > before:
+            msg += f" ({rejected.total - before} linhas rejeitadas)"
         print(msg)
         all_barcodes.extend(result.barcodes)
-        all_rejected.extend(result.rejected)
 
-    return ReadResult(barcodes=all_barcodes, rejected=all_rejected)
+    return ReadResult(
+        barcodes=all_barcodes,
+        rejected=rejected,
+        provenance=provenance,
+        anomalies=detector,
+    )
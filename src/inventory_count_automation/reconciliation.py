@@ -0,0 +1,182 @@
+from array import array
+from typing import NamedTuple
+import dataclasses
+import heapq
+import re
+
+# Quantidade padrão de divergências exibidas no relatório
+DEFAULT_TOP_N = 20
+
+# Número no formato pt-BR com separador de milhar: 1.234 / 1.234,56 / -12.345.678,9
+_THOUSANDS_BR = re.compile(r"[+-]?\d{1,3}(?:\.\d{3})+(?:,\d*)?")
+
+
+@dataclasses.dataclass
+class ExpectedStock:
+    """
+    Saldo do sistema e custo unitário por linha da planilha.
+
+    Preenchido na mesma passada que constrói o índice de barcodes (ver
+    ``excel_handler._build_barcode_index``); os valores ficam em ``array``
+    paralelos para que a conciliação opere em lote, sem voltar às células.
+    """
+    barcodes: list[str] = dataclasses.field(default_factory=list)
+    rows: array = dataclasses.field(default_factory=lambda: array("q"))
+    expected: array = dataclasses.field(default_factory=lambda: array("d"))
+    unit_cost: array = dataclasses.field(default_factory=lambda: array("d"))
+    has_cost: bool = False
+    invalid: int = 0   # células de saldo/custo com texto não numérico (contadas como 0)
+
+    def add(self, barcode: str, row: int, expected: object, unit_cost: object = None) -> None:
+        self.barcodes.append(barcode)
+        self.rows.append(row)
+        self.expected.append(self._number(expected))
+        self.unit_cost.append(self._number(unit_cost))
+
+    def _number(self, value: object) -> float:
+        number = parse_number(value)
+        if number is None:
+            self.invalid += 1
+            return 0.0
+        return number
+
+    def __len__(self) -> int:
+        return len(self.barcodes)
+
+
+def parse_number(value: object) -> float | None:
+    """
+    Converte o valor de uma célula em número; vazio vira 0 e texto inválido, None.
+
+    Aceita vírgula decimal e separador de milhar com ponto (``"1.234,56"``).
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if not text:
+        return 0.0
+    if _THOUSANDS_BR.fullmatch(text):
+        text = text.replace(".", "")
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def to_number(value: object) -> float:
+    """Converte o valor de uma célula em número; vazio ou texto inválido vira 0."""
+    number = parse_number(value)
+    return 0.0 if number is None else number
+
+
+class Discrepancy(NamedTuple):
+    """Divergência de uma linha: contado - esperado."""
+    barcode: str
+    row: int
+    expected: float
+    counted: float
+    variance: float
+    pct: float | None        # variância / esperado (None se esperado = 0)
+    value_impact: float      # variância * custo unitário
+
+
+@dataclasses.dataclass
+class ReconciliationReport:
+    """Totais da conciliação e as maiores divergências."""
+    rows: int
+    rows_with_variance: int
+    expected_total: float
+    counted_total: float
+    net_variance: float
+    abs_variance: float
+    net_value_impact: float
+    abs_value_impact: float
+    has_cost: bool
+    top: list[Discrepancy]
+    invalid_cells: int = 0   # células de saldo/custo não numéricas, tratadas como 0
+
+
+def reconcile(
+    stock: ExpectedStock,
+    counted: dict[str, int],
+    barcode_index: dict[str, int],
+    top_n: int = DEFAULT_TOP_N,
+) -> ReconciliationReport:
+    """
+    Compara o saldo esperado com o contado para todas as linhas da planilha.
+
+    A quantidade contada é atribuída à mesma linha em que ``assign_balances``
+    a escreve (a última ocorrência do barcode); linhas não contadas entram com
+    quantidade 0. As divergências são ordenadas pelo impacto em valor, ou pela
+    variância absoluta quando o layout não tem coluna de custo.
+    """
+    barcodes, rows = stock.barcodes, stock.rows
+    counted_qty = array("d", [
+        counted.get(barcode, 0) if barcode_index.get(barcode) == row else 0
+        for barcode, row in zip(barcodes, rows)
+    ])
+    variance = array("d", [c - e for c, e in zip(counted_qty, stock.expected)])
+    value_impact = array("d", [v * cost for v, cost in zip(variance, stock.unit_cost)])
+
+    rank = value_impact if stock.has_cost else variance
+    top_ids = heapq.nlargest(
+        top_n,
+        (i for i, v in enumerate(variance) if v),
+        key=lambda i: abs(rank[i]),
+    )
+    top = [
+        Discrepancy(
+            barcode=barcodes[i],
+            row=rows[i],
+            expected=stock.expected[i],
+            counted=counted_qty[i],
+            variance=variance[i],
+            pct=variance[i] / stock.expected[i] if stock.expected[i] else None,
+            value_impact=value_impact[i],
+        )
+        for i in top_ids
+    ]
+
+    return ReconciliationReport(
+        rows=len(stock),
+        rows_with_variance=sum(1 for v in variance if v),
+        expected_total=sum(stock.expected),
+        counted_total=sum(counted_qty),
+        net_variance=sum(variance),
+        abs_variance=sum(map(abs, variance)),
+        net_value_impact=sum(value_impact),
+        abs_value_impact=sum(map(abs, value_impact)),
+        has_cost=stock.has_cost,
+        top=top,
+        invalid_cells=stock.invalid,
+    )
+
+
+def print_reconciliation(report: ReconciliationReport) -> None:
+    """Imprime os totais e as maiores divergências no console."""
+    print(f"  📑 Linhas conciliadas: {report.rows} ({report.rows_with_variance} com divergência)")
+    print(f"  📦 Esperado: {report.expected_total:g}  |  Contado: {report.counted_total:g}")
+    print(f"  ↕️  Variação líquida: {report.net_variance:+g}  |  absoluta: {report.abs_variance:g}")
+    if report.has_cost:
+        print(
+            f"  💰 Impacto em valor: {report.net_value_impact:+,.2f} líquido  |  "
+            f"{report.abs_value_impact:,.2f} absoluto"
+        )
+    if report.invalid_cells:
+        print(f"  ⚠️  {report.invalid_cells} célula(s) de saldo/custo não numérica(s) contada(s) como 0")
+
+    if not report.top:
+        return
+
+    print(f"\n  🔝 Maiores divergências ({len(report.top)}):")
+    for d in report.top:
+        pct = f"{d.pct:+.1%}" if d.pct is not None else "n/a"
+        line = (
+            f"     • {d.barcode} (linha {d.row}): esperado {d.expected:g}, "
+            f"contado {d.counted:g}, variação {d.variance:+g} ({pct})"
+        )
+        if report.has_cost:
+            line += f", impacto {d.value_impact:+,.2f}"
+        print(line)
@@ -0,0 +1,219 @@
+from collections.abc import Iterable
+from pathlib import Path
+import hashlib
+import heapq
+import math
+
+# Linhas distintas contadas com exatidão antes de passar ao modo aproximado
+DEFAULT_REJECTED_LIMIT = 10_000
+
+# Linhas por página no relatório do console
+DEFAULT_PAGE_SIZE = 50
+
+# Precisão do HyperLogLog: 2**12 registradores (~4 KiB, erro padrão ~1,6%)
+_HLL_PRECISION = 12
+_HLL_REGISTERS = 1 << _HLL_PRECISION
+_HLL_RANK_BITS = 64 - _HLL_PRECISION
+
+
+class RejectedLines:
+    """
+    Contagem das linhas rejeitadas na leitura com memória limitada.
+
+    Até ``limit`` linhas distintas, as contagens são exatas. Ao ultrapassar
+    o limite, passa a manter apenas as linhas mais frequentes (algoritmo de
+    Misra-Gries: quando a tabela enche, a contagem da ``limit // 2``-ésima
+    maior é descontada de todas e as que zeram são descartadas) e estima a
+    quantidade de linhas distintas com um HyperLogLog. O total de
+    ocorrências é sempre exato.
+
+    No modo aproximado, a contagem de cada linha mantida é um limite
+    inferior: a real está entre ``count`` e ``count + error_bound``.
+    Com ``limit=None`` todas as linhas são mantidas com exatidão.
+
+    O HyperLogLog usa um hash estável (blake2b de 64 bits), de modo que os
+    registradores (``sketch``) de execuções ou nós diferentes podem ser
+    combinados com ``merge``.
+    """
+
+    __slots__ = ("limit", "total", "error_bound", "_counts", "_registers")
+
+    def __init__(self, limit: int | None = DEFAULT_REJECTED_LIMIT) -> None:
+        if limit is not None and limit < 2:
+            raise ValueError("limit (linhas rejeitadas distintas mantidas) deve ser maior ou igual a 2.")
+        self.limit = limit
+        self.total = 0
+        self.error_bound = 0
+        self._counts: dict[str, int] = {}
+        self._registers: bytearray | None = None
+
+    @classmethod
+    def from_counts(cls, counts: dict[str, int], limit: int | None = DEFAULT_REJECTED_LIMIT) -> "RejectedLines":
+        """Cria a partir de um dicionário {linha: ocorrências} (ex.: contagem parcial)."""
+        rejected = cls(limit)
+        rejected.update(counts.items())
+        return rejected
+
+    @classmethod
+    def from_state(
+        cls,
+        counts: dict[str, int],
+        total: int,
+        error_bound: int = 0,
+        sketch: bytes | None = None,
+        limit: int | None = DEFAULT_REJECTED_LIMIT,
+    ) -> "RejectedLines":
+        """
+        Reconstrói a partir do estado salvo (ex.: contagem parcial): linhas
+        mantidas, total exato, erro máximo e registradores do HyperLogLog
+        (``sketch``, None se as contagens forem exatas).
+        """
+        if sketch is not None and len(sketch) != _HLL_REGISTERS:
+            raise ValueError(f"sketch deve ter {_HLL_REGISTERS} registradores, recebido {len(sketch)}.")
+
+        rejected = cls(limit)
+        rejected._counts = dict(counts)
+        rejected.total = total
+        rejected.error_bound = error_bound
+        if sketch is not None:
+            rejected._registers = bytearray(sketch)
+        if limit is not None and len(rejected._counts) > limit:
+            rejected._compact()
+        return rejected
+
+    # ── Registro ─────────────────────────────────────────
+
+    def add(self, line: str, n: int = 1) -> None:
+        self.total += n
+        counts = self._counts
+        if line in counts:
+            counts[line] += n
+            return
+
+        counts[line] = n
+        if self._registers is not None:
+            self._hll_add(line)
+        if self.limit is not None and len(counts) > self.limit:
+            self._compact()
+
+    def update(self, items: Iterable[tuple[str, int]]) -> None:
+        for line, n in items:
+            self.add(line, n)
+
+    def merge(self, other: "RejectedLines") -> None:
+        """
+        Acumula as linhas rejeitadas de ``other`` (ex.: de outro nó).
+
+        Totais e erros máximos são somados, os HyperLogLog são combinados
+        registrador a registrador (máximo) e as contagens mantidas são
+        somadas, compactando de novo se ``limit`` for ultrapassado.
+        """
+        self.total += other.total
+        self.error_bound += other.error_bound
+
+        if self._registers is not None or other._registers is not None:
+            self._start_sketch()
+            if other._registers is None:
+                # Exato: todas as linhas distintas de ``other`` estão na tabela
+                for line in other._counts:
+                    self._hll_add(line)
+            else:
+                self._registers = bytearray(map(max, self._registers, other._registers))
+
+        counts = self._counts
+        for line, n in other._counts.items():
+            counts[line] = counts.get(line, 0) + n
+        if self.limit is not None and len(counts) > self.limit:
+            self._compact()
+
+    def _start_sketch(self) -> None:
+        """Cria o HyperLogLog com as linhas distintas vistas até aqui (todas ainda na tabela)."""
+        if self._registers is None:
+            self._registers = bytearray(_HLL_REGISTERS)
+            for line in self._counts:
+                self._hll_add(line)
+
+    def _compact(self) -> None:
+        """Passo em lote do Misra-Gries: mantém só as ``limit // 2`` linhas mais frequentes."""
+        self._start_sketch()
+
+        keep = self.limit // 2
+        cut = heapq.nlargest(keep + 1, self._counts.values())[-1]
+        self._counts = {line: n - cut for line, n in self._counts.items() if n > cut}
+        self.error_bound += cut
+
+    def _hll_add(self, line: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(line.encode("utf-8", "surrogatepass"), digest_size=8).digest())
+        rest = h & ((1 << _HLL_RANK_BITS) - 1)
+        rank = _HLL_RANK_BITS - rest.bit_length() + 1
+        index = h >> _HLL_RANK_BITS
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    # ── Consulta ─────────────────────────────────────────
+
+    @property
+    def approximate(self) -> bool:
+        """True se o limite foi ultrapassado (contagens e distintas passam a ser estimativas)."""
+        return self._registers is not None
+
+    @property
+    def sketch(self) -> bytes | None:
+        """Registradores do HyperLogLog (None enquanto as contagens forem exatas)."""
+        return bytes(self._registers) if self._registers is not None else None
+
+    @property
+    def distinct(self) -> int:
+        """Quantidade de linhas distintas (estimada pelo HyperLogLog no modo aproximado)."""
+        if self._registers is None:
+            return len(self._counts)
+
+        m = _HLL_REGISTERS
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # correção para cardinalidades pequenas
+        return max(len(self._counts), round(estimate))
+
+    def most_common(self, n: int | None = None) -> list[tuple[str, int]]:
+        """Linhas mantidas ordenadas por ocorrências (decrescente) e depois pelo texto."""
+        key = lambda item: (-item[1], item[0])
+        if n is None:
+            return sorted(self._counts.items(), key=key)
+        return heapq.nsmallest(n, self._counts.items(), key=key)
+
+    def page(self, number: int, size: int = DEFAULT_PAGE_SIZE) -> list[tuple[str, int]]:
+        """Página ``number`` (1-based) de ``most_common()``."""
+        if number < 1 or size < 1:
+            raise ValueError("Página e tamanho da página devem ser maiores ou iguais a 1.")
+        return self.most_common(number * size)[(number - 1) * size:]
+
+    def pages(self, size: int = DEFAULT_PAGE_SIZE) -> int:
+        """Quantidade de páginas de ``most_common()``."""
+        return -(-len(self._counts) // size)
+
+    def count(self, line: str) -> int:
+        return self._counts.get(line, 0)
+
+    def __contains__(self, line: str) -> bool:
+        return line in self._counts
+
+    def __len__(self) -> int:
+        """Total de ocorrências (exato)."""
+        return self.total
+
+
+def write_rejected_report(rejected: RejectedLines, path: Path) -> None:
+    """Grava todas as linhas mantidas em ``path`` (TSV: ocorrências, linha)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        f.write(f"# ocorrências: {rejected.total}\n")
+        if rejected.approximate:
+            f.write(
+                f"# linhas distintas (estimativa): ~{rejected.distinct}\n"
+                f"# contagens aproximadas: a real está entre o valor e o valor + {rejected.error_bound}\n"
+            )
+        else:
+            f.write(f"# linhas distintas: {rejected.distinct}\n")
+        f.write("ocorrencias\tlinha\n")
+        f.writelines(f"{n}\t{line}\n" for line, n in rejected.most_common())
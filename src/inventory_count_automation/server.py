@@ -0,0 +1,192 @@
+"""
+Serviço HTTP/JSON local sobre uma ``CountSession``.
+
+Mantém a sessão (layout, índice da planilha e contagem) carregada entre
+requisições, de modo que consultas repetidas são respondidas a partir do
+estado em memória. Pensado para uso local (padrão: 127.0.0.1), sem
+autenticação. Para que uma página aberta no navegador não consiga
+acionar o serviço (CSRF, DNS rebinding), são recusadas requisições com
+cabeçalho Origin ou com Host diferente do endereço de escuta ou de
+localhost, e todo POST exige Content-Type application/json.
+
+Rotas:
+
+    GET  /health             estado da sessão
+    GET  /counts             {barcode: quantidade}
+    GET  /counts/<barcode>   quantidade, linha na planilha e status
+    GET  /rejected?limit=N   linhas rejeitadas mais frequentes
+    GET  /reconcile?top=N    conciliação saldo do sistema x contado
+    POST /ingest             {"lines": [...]}, uma leitura por item
+    POST /match              compara a contagem com a planilha (sem gravar)
+    POST /flush              grava os saldos na planilha
+    POST /reload             recarrega config.toml e planilha, se mudaram
+    POST /reset              zera as contagens
+"""
+
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+import dataclasses
+import json
+
+from inventory_count_automation.reconciliation import DEFAULT_TOP_N
+from inventory_count_automation.rejected import DEFAULT_PAGE_SIZE
+from inventory_count_automation.session import CountSession
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Tamanho máximo do corpo de uma requisição (64 MiB)
+MAX_BODY_BYTES = 64 * 2**20
+
+# Nomes sempre aceitos no cabeçalho Host, além do endereço de escuta
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+class _RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class SessionRequestHandler(BaseHTTPRequestHandler):
+    """Traduz requisições HTTP em chamadas à ``CountSession`` do servidor."""
+
+    server_version = "inventory-count"
+    server: "SessionServer"
+
+    # ── Rotas ────────────────────────────────────────────
+
+    def _get(self, path: str, query: dict[str, list[str]]) -> object:
+        session = self.server.session
+        if path == "/health":
+            return {"status": "ok", **session.stats()}
+        if path == "/counts":
+            return session.counts()
+        if path.startswith("/counts/"):
+            barcode = unquote(path.removeprefix("/counts/"))
+            record = session.lookup(barcode)
+            if record is None:
+                return {"barcode": barcode.strip().upper(), "qty": 0, "row": None, "status": None}
+            return {"barcode": record.barcode, "qty": record.qty, "row": record.row, "status": record.status.name}
+        if path == "/rejected":
+            return session.rejected_summary(_int_param(query, "limit", DEFAULT_PAGE_SIZE))
+        if path == "/reconcile":
+            report = session.reconcile(top_n=_int_param(query, "top", DEFAULT_TOP_N))
+            return {**dataclasses.asdict(report), "top": [d._asdict() for d in report.top]}
+        raise _RequestError(HTTPStatus.NOT_FOUND, f"Rota não encontrada: {path}")
+
+    def _post(self, path: str) -> object:
+        session = self.server.session
+        if path == "/ingest":
+            return dataclasses.asdict(session.ingest(self._read_lines()))
+        if path == "/match":
+            return dataclasses.asdict(session.match())
+        if path == "/flush":
+            return dataclasses.asdict(session.flush())
+        if path == "/reload":
+            return {"reloaded": session.reload(), "config_digest": session.config_digest}
+        if path == "/reset":
+            session.reset()
+            return {"status": "ok"}
+        raise _RequestError(HTTPStatus.NOT_FOUND, f"Rota não encontrada: {path}")
+
+    # ── Infraestrutura ───────────────────────────────────
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        self._dispatch(lambda: self._get(url.path, parse_qs(url.query)))
+
+    def do_POST(self) -> None:
+        self._dispatch(lambda: self._post(urlsplit(self.path).path), post=True)
+
+    def _dispatch(self, handler, post: bool = False) -> None:
+        try:
+            self._check_client(post)
+            self._send(HTTPStatus.OK, handler())
+        except _RequestError as e:
+            self._send(e.status, {"error": str(e)})
+        except FileNotFoundError as e:
+            self._send(HTTPStatus.NOT_FOUND, {"error": str(e)})
+        except ValueError as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except Exception as e:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+
+    def _check_client(self, post: bool) -> None:
+        """Recusa requisições vindas de páginas web e POSTs que não sejam JSON."""
+        if self.headers.get("Origin") is not None:
+            raise _RequestError(HTTPStatus.FORBIDDEN, "Requisições com cabeçalho Origin não são aceitas.")
+        host = self.headers.get("Host", "")
+        if host.lower() not in self.server.allowed_hosts:
+            raise _RequestError(HTTPStatus.FORBIDDEN, f"Host não permitido: {host!r}")
+        if post and self.headers.get_content_type() != "application/json":
+            # Formulários HTML só enviam JSON com preflight de CORS, que o serviço não atende
+            raise _RequestError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "POST exige Content-Type application/json.")
+
+    def _read_lines(self) -> list[str]:
+        """Lê as leituras do corpo JSON {"lines": [...]}."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # rfile.read(-1) bloquearia a thread até o cliente fechar a conexão
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "Content-Length inválido.")
+        if length > MAX_BODY_BYTES:
+            raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo da requisição muito grande.")
+        body = self.rfile.read(length).decode("utf-8")
+
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, f"JSON inválido: {e}") from None
+        lines = data.get("lines") if isinstance(data, dict) else None
+        if not isinstance(lines, list) or not all(isinstance(line, str) for line in lines):
+            raise _RequestError(HTTPStatus.BAD_REQUEST, 'Esperado {"lines": ["...", ...]}.')
+        return lines
+
+    def _send(self, status: HTTPStatus, payload: object) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class SessionServer(ThreadingHTTPServer):
+    """Servidor HTTP com várias threads compartilhando uma ``CountSession``."""
+
+    daemon_threads = True
+
+    def __init__(self, session: CountSession, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, verbose: bool = False) -> None:
+        super().__init__((host, port), SessionRequestHandler)
+        self.session = session
+        self.verbose = verbose
+        self.allowed_hosts = _allowed_hosts((host, *LOCAL_HOSTS), self.server_address[1])
+
+
+def _allowed_hosts(names: tuple[str, ...], port: int) -> frozenset[str]:
+    """Valores aceitos no cabeçalho Host: cada nome, com e sem a porta (IPv6 entre colchetes)."""
+    hosts = set()
+    for name in names:
+        if ":" in name:
+            name = f"[{name}]"
+        name = name.lower()
+        hosts.update((name, f"{name}:{port}"))
+    return frozenset(hosts)
+
+
+def _int_param(query: dict[str, list[str]], name: str, default: int) -> int:
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return int(values[0])
+    except ValueError:
+        raise _RequestError(HTTPStatus.BAD_REQUEST, f"Parâmetro '{name}' deve ser um número inteiro.") from None
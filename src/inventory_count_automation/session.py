@@ -0,0 +1,308 @@
+"""
+Sessão de contagem de longa duração.
+
+API em processo para integrações (ex.: WMS) que hoje precisariam chamar o
+CLI a cada requisição: a sessão mantém o layout, o índice da planilha e a
+tabela de contagem carregados, e responde a ingestão, consulta, match e
+gravação a partir desse estado. Não imprime nada e não chama ``sys.exit``:
+erros são lançados como exceções. Ver ``server`` para o serviço HTTP/JSON.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+import dataclasses
+import hashlib
+import threading
+
+from inventory_count_automation.settings import LayoutConfig, CONFIG_PATH, load_config
+from inventory_count_automation.excel_handler import IndexedWorkbook, load_indexed_workbook, write_balances
+from inventory_count_automation.reconciliation import ReconciliationReport, reconcile, DEFAULT_TOP_N
+from inventory_count_automation.rejected import RejectedLines, DEFAULT_PAGE_SIZE, DEFAULT_REJECTED_LIMIT
+from inventory_count_automation.table import BarcodeRecord, BarcodeTable
+
+
+@dataclasses.dataclass(frozen=True)
+class IngestResult:
+    """Leituras aceitas e rejeitadas em uma chamada de ``ingest``."""
+    accepted: int
+    rejected: int
+
+
+@dataclasses.dataclass(frozen=True)
+class MatchResult:
+    """Situação da contagem atual em relação à planilha."""
+    matched: int            # barcodes contados e presentes na planilha
+    not_found: list[str]    # barcodes contados, mas ausentes na planilha
+    uncounted: int          # barcodes da planilha ainda não contados
+    units: int              # total de unidades contadas
+
+
+@dataclasses.dataclass(frozen=True)
+class FlushResult:
+    """Resultado da gravação dos saldos na planilha."""
+    path: str
+    matched: int
+    not_found: list[str]
+
+
+def _file_stamp(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, tamanho) do arquivo, ou None se ele não existir."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _index_fields(layout: LayoutConfig) -> tuple:
+    """Campos do layout que afetam a planilha e o índice (tudo menos descrição e filtro)."""
+    return dataclasses.astuple(dataclasses.replace(layout, description="", barcode_prefix="", barcode_suffix=""))
+
+
+class CountSession:
+    """
+    Estado de contagem carregado uma única vez e reutilizado entre chamadas.
+
+    A configuração é lida de ``config_path``; ``layout_name`` fixa um layout
+    (None = segue o layout ativo). A planilha só é carregada e indexada na
+    primeira operação que precisa dela. ``reload()`` compara o hash do
+    config.toml e a data de modificação da planilha com os já carregados e
+    recarrega apenas o que mudou, preservando as contagens; a nova planilha
+    é indexada fora do lock, então as consultas continuam sendo atendidas
+    durante a recarga. Com ``auto_reload=True``, essa verificação é feita
+    antes de cada operação que usa a planilha.
+
+    Todos os métodos públicos são seguros para uso em várias threads.
+    """
+
+    def __init__(
+        self,
+        config_path: Path = CONFIG_PATH,
+        layout_name: str | None = None,
+        planilha_path: Path | None = None,
+        auto_reload: bool = False,
+        rejected_limit: int | None = DEFAULT_REJECTED_LIMIT,
+    ) -> None:
+        self.config_path = config_path
+        self.layout_name = layout_name
+        self.planilha_path = planilha_path
+        self.auto_reload = auto_reload
+        self.table = BarcodeTable()
+        self.rejected = RejectedLines(rejected_limit)
+
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._config_stamp: tuple[int, int] | None = None
+        self._config_digest = ""
+        self._layout: LayoutConfig | None = None
+        self._active_name = ""
+        self._indexed: IndexedWorkbook | None = None
+        self._planilha_stamp: tuple[int, int] | None = None
+
+        self._load_layout()
+
+    # ── Configuração e planilha ──────────────────────────
+
+    @property
+    def layout(self) -> LayoutConfig:
+        return self._layout
+
+    @property
+    def config_digest(self) -> str:
+        """sha256 do config.toml carregado."""
+        return self._config_digest
+
+    def _load_layout(self) -> tuple[bool, bool]:
+        """
+        Relê o config.toml se o conteúdo mudou. Retorna (layout mudou,
+        planilha precisa ser reindexada).
+        """
+        stamp = _file_stamp(self.config_path)
+        if stamp is not None and stamp == self._config_stamp:
+            return False, False
+
+        raw = self.config_path.read_bytes() if stamp is not None else b""
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self._config_digest:
+            self._config_stamp = stamp
+            return False, False
+
+        config = load_config(self.config_path)
+        name = self.layout_name or config.active_layout
+        if name not in config.layouts:
+            raise ValueError(
+                f"Layout '{name}' não encontrado. "
+                f"Disponíveis: {list(config.layouts.keys())}"
+            )
+        layout = config.layouts[name]
+        layout.compiled  # valida as colunas antes de trocar o layout em uso
+
+        with self._lock:
+            changed = layout != self._layout
+            stale = self._layout is not None and _index_fields(layout) != _index_fields(self._layout)
+            self._layout, self._active_name = layout, name
+            self._config_stamp, self._config_digest = stamp, digest
+        return changed, stale
+
+    def _load_index(self) -> tuple[IndexedWorkbook, BarcodeTable, tuple[int, int] | None]:
+        """Carrega e indexa a planilha numa tabela nova, ainda não visível para as consultas."""
+        table = BarcodeTable()
+        indexed = load_indexed_workbook(self._layout, self.planilha_path, table)
+        return indexed, table, _file_stamp(indexed.path)
+
+    def _swap_index(self, indexed: IndexedWorkbook, table: BarcodeTable, stamp: tuple[int, int] | None) -> None:
+        """Passa a usar o novo índice, levando as contagens já feitas para a nova tabela."""
+        with self._lock:
+            for barcode, qty in self.table.counted().items():
+                table.add_qty(barcode, qty)
+            self.table = table
+            self._indexed = indexed
+            self._planilha_stamp = stamp
+
+    def _ensure_index(self) -> IndexedWorkbook:
+        if self.auto_reload:
+            self.reload()
+        with self._lock:
+            if self._indexed is None:
+                self._swap_index(*self._load_index())
+            return self._indexed
+
+    def reload(self) -> bool:
+        """
+        Recarrega o que mudou desde a última carga: o layout (pelo hash do
+        config.toml) e a planilha (pela data de modificação). Retorna True
+        se algo foi recarregado. As contagens são preservadas.
+        """
+        with self._reload_lock:
+            changed, stale = self._load_layout()
+            indexed = self._indexed
+            if indexed is None:
+                return changed  # a planilha ainda não foi carregada: será na primeira operação
+            if not stale and _file_stamp(indexed.path) == self._planilha_stamp:
+                return changed
+            self._swap_index(*self._load_index())
+            return True
+
+    # ── Contagem ─────────────────────────────────────────
+
+    def ingest(self, lines: Iterable[str]) -> IngestResult:
+        """Contabiliza leituras (uma por item, como nas linhas dos .txt)."""
+        accepted = rejected = 0
+        with self._lock:
+            validate = self._layout.compiled.validate
+            add_qty = self.table.add_qty
+            reject = self.rejected.add
+            for line in lines:
+                raw = line.strip()
+                if not raw:
+                    continue
+                if validate(raw):
+                    add_qty(raw.upper())
+                    accepted += 1
+                else:
+                    reject(raw)
+                    rejected += 1
+        return IngestResult(accepted, rejected)
+
+    def ingest_file(self, path: Path) -> IngestResult:
+        """Contabiliza as leituras de um arquivo .txt."""
+        with path.open("r", encoding="utf-8") as f:
+            return self.ingest(f)
+
+    def count(self, barcode: str) -> int:
+        """Quantidade contada de ``barcode`` (0 se nunca lido)."""
+        barcode = barcode.strip().upper()
+        with self._lock:
+            if barcode not in self.table:
+                return 0
+            return self.table.record(barcode).qty
+
+    def counts(self) -> dict[str, int]:
+        """{barcode: quantidade} de tudo o que foi contado, ordenado por barcode."""
+        with self._lock:
+            return self.table.counted()
+
+    def lookup(self, barcode: str) -> BarcodeRecord | None:
+        """Registro do barcode (quantidade, linha na planilha, status) ou None se desconhecido."""
+        self._ensure_index()
+        barcode = barcode.strip().upper()
+        with self._lock:
+            if barcode not in self.table:
+                return None
+            return self.table.record(barcode)
+
+    def rejected_summary(self, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        """Totais e as ``limit`` linhas rejeitadas mais frequentes."""
+        with self._lock:
+            rejected = self.rejected
+            return {
+                "total": rejected.total,
+                "distinct": rejected.distinct,
+                "approximate": rejected.approximate,
+                "error_bound": rejected.error_bound,
+                "lines": [{"line": line, "count": n} for line, n in rejected.most_common(limit)],
+            }
+
+    def reset(self) -> None:
+        """Zera as contagens e as linhas rejeitadas, mantendo planilha e layout carregados."""
+        with self._lock:
+            self.table.reset_counts()
+            self.rejected = RejectedLines(self.rejected.limit)
+
+    # ── Planilha ─────────────────────────────────────────
+
+    def match(self) -> MatchResult:
+        """Compara a contagem atual com o índice da planilha, sem gravar nada."""
+        indexed = self._ensure_index()
+        with self._lock:
+            counted = self.table.counted()
+            index = indexed.index
+            not_found = [barcode for barcode in counted if barcode not in index]
+            return MatchResult(
+                matched=len(counted) - len(not_found),
+                not_found=not_found,
+                uncounted=sum(1 for barcode in index if barcode not in counted),
+                units=sum(counted.values()),
+            )
+
+    def flush(self, save_path: Path | None = None) -> FlushResult:
+        """Escreve os saldos contados na planilha e salva (no próprio arquivo, por padrão)."""
+        indexed = self._ensure_index()
+        with self._lock:
+            ws = indexed.wb.active
+            if ws is None:
+                raise ValueError("Workbook não possui uma planilha ativa")
+
+            # A planilha em memória é reaproveitada entre flushes: limpa o que deixou de ser contado
+            result = write_balances(
+                ws, self._layout, self.table.counted(), indexed.index, self.table, clear_uncounted=True,
+            )
+            path = save_path if save_path is not None else indexed.path
+            indexed.wb.save(path)
+            if path == indexed.path:
+                # O arquivo salvo corresponde ao estado em memória: não há o que recarregar
+                self._planilha_stamp = _file_stamp(path)
+
+        return FlushResult(str(path), len(result["matched"]), result["not_found"])
+
+    def reconcile(self, top_n: int = DEFAULT_TOP_N) -> ReconciliationReport:
+        """Conciliação saldo do sistema x contado. Lança ValueError se o layout não tiver col_qtd_sistema."""
+        indexed = self._ensure_index()
+        if indexed.stock is None:
+            raise ValueError("O layout não tem coluna de saldo do sistema (col_qtd_sistema).")
+        with self._lock:
+            return reconcile(indexed.stock, self.table.counted(), indexed.index, top_n=top_n)
+
+    def stats(self) -> dict:
+        """Resumo do estado da sessão."""
+        with self._lock:
+            counted = self.table.counted()
+            return {
+                "layout": self._active_name,
+                "config_digest": self._config_digest,
+                "planilha": str(self._indexed.path) if self._indexed is not None else None,
+                "planilha_rows": len(self._indexed.index) if self._indexed is not None else None,
+                "barcodes": len(counted),
+                "units": sum(counted.values()),
+                "rejected": self.rejected.total,
+            }
@@ -1,9 +1,19 @@
+from collections.abc import Callable
 from pathlib import Path
+import contextlib
+import copy
 import dataclasses
+import functools
+import hashlib
+import os
+import tempfile
+import threading
 import tomli_w
 import tomllib
 import re
 
+from openpyxl.utils import column_index_from_string
+
 # ── Diretórios (infraestrutura) ─────────────────────────
 ROOT_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT_DIR / "data"
@@ -11,6 +21,91 @@ INPUT_TXT_DIR = DATA_DIR / "txt"
 CONFIG_PATH = DATA_DIR / "config.toml"
 INPUT_PLANILHA_DIR = DATA_DIR / "planilhas"
 
+# Limite de entradas dos caches em memória (os mais antigos são descartados)
+CONFIG_CACHE_SIZE = 8
+COMPILED_CACHE_SIZE = 64
+PATTERN_CACHE_SIZE = 64
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _build_barcode_pattern(barcode_prefix: str, barcode_suffix: str) -> re.Pattern[str]:
+    """ Constrói o regex a partir do prefixo e sufixo informados pelo usuário. """
+    if not barcode_prefix and not barcode_suffix:
+        return re.compile(r"^.+$")  # sem filtro — aceita qualquer linha não-vazia
+
+    prefix = re.escape(barcode_prefix)
+    suffix = re.escape(barcode_suffix)
+
+    if prefix and suffix:
+        pattern = f"^{prefix}\\S+{suffix}$"
+    elif prefix:
+        pattern = f"^{prefix}\\S+$"
+    else:
+        pattern = f"^\\S+{suffix}$"
+
+    return re.compile(pattern, re.IGNORECASE)
+
+def normalize_key(value: object) -> str:
+    """Normaliza o valor de uma célula para comparação com os barcodes lidos."""
+    return str(value).strip().upper()
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CompiledLayout:
+    """
+    Artefatos pré-computados de um LayoutConfig para os caminhos quentes.
+
+    Colunas já convertidas em índices numéricos (1-based, como no openpyxl),
+    e validador/normalizador prontos para chamada direta.
+    """
+    data_start_row: int
+    key_col: int                        # col_chave_busca
+    qty_col: int                        # col_qtd_fisico
+    secondary_cols: dict[str, int]      # {nome_do_campo: índice}, apenas as configuradas
+    expected_col: int | None            # col_qtd_sistema (None = sem conciliação)
+    cost_col: int | None                # col_custo_unitario
+    validate: Callable[[str], re.Match[str] | None]
+    normalize: Callable[[object], str]
+
+_SECONDARY_FIELDS = ("col_ean", "col_cod_sistema", "col_cod_xml", "col_descricao", "col_sku")
+
+def _optional_column(letter: str) -> int | None:
+    return column_index_from_string(letter) if letter else None
+
+# Layouts já compilados, indexados pelos valores do LayoutConfig
+_compiled_layouts: dict[tuple, CompiledLayout] = {}
+_cache_lock = threading.Lock()
+
+def _cache_put(cache: dict, key, value, limit: int) -> None:
+    """Insere em ``cache`` descartando as entradas mais antigas acima de ``limit``."""
+    with _cache_lock:
+        cache[key] = value
+        while len(cache) > limit:
+            del cache[next(iter(cache))]
+
+def compile_layout(layout: "LayoutConfig") -> CompiledLayout:
+    """
+    Retorna o CompiledLayout de ``layout``, compilando apenas na primeira vez
+    para cada combinação de valores. Lança ValueError se alguma coluna for inválida.
+    """
+    key = dataclasses.astuple(layout)
+    compiled = _compiled_layouts.get(key)
+    if compiled is None:
+        compiled = CompiledLayout(
+            data_start_row=layout.data_start_row,
+            key_col=column_index_from_string(layout.col_chave_busca),
+            qty_col=column_index_from_string(layout.col_qtd_fisico),
+            secondary_cols={
+                field: column_index_from_string(getattr(layout, field))
+                for field in _SECONDARY_FIELDS
+                if getattr(layout, field)
+            },
+            expected_col=_optional_column(layout.col_qtd_sistema),
+            cost_col=_optional_column(layout.col_custo_unitario),
+            validate=layout.compiled_barcode_pattern.match,
+            normalize=normalize_key,
+        )
+        _cache_put(_compiled_layouts, key, compiled, COMPILED_CACHE_SIZE)
+    return compiled
+
 @dataclasses.dataclass
 class LayoutConfig:
     """Configurações e constantes do projeto."""
@@ -35,27 +130,23 @@ class LayoutConfig:
     col_descricao: str = ""      # Coluna com a descrição do item
     col_sku: str = ""            # Coluna com o SKU do item
 
+    # ── Conciliação (opcionais) ───────────────────────────────────────────────
+    col_qtd_sistema: str = ""    # Coluna com o saldo esperado (estoque do sistema)
+    col_custo_unitario: str = "" # Coluna com o custo unitário do item
+
     # ── Barcode — prefixo e sufixo ───────────────────────────────────────────
     barcode_prefix: str = ""    # Prefixo obrigatório do código (ex: "MCS000")
     barcode_suffix: str = ""    # Sufixo obrigatório do código (ex: "BR")
 
     @property
     def compiled_barcode_pattern(self) -> re.Pattern[str]:
-        """ Constrói o regex a partir do prefixo e sufixo informados pelo usuário. """
-        if not self.barcode_prefix and not self.barcode_suffix:
-            return re.compile(r"^.+$")  # sem filtro — aceita qualquer linha não-vazia
-
-        prefix = re.escape(self.barcode_prefix)
-        suffix = re.escape(self.barcode_suffix)
+        """ Regex do barcode a partir do prefixo e sufixo (compilada uma única vez). """
+        return _build_barcode_pattern(self.barcode_prefix, self.barcode_suffix)
 
-        if prefix and suffix:
-            pattern = f"^{prefix}\\S+{suffix}$"
-        elif prefix:
-            pattern = f"^{prefix}\\S+$"
-        else:
-            pattern = f"^\\S+{suffix}$"
-
-        return re.compile(pattern, re.IGNORECASE)
+    @property
+    def compiled(self) -> CompiledLayout:
+        """ Artefatos pré-computados (índices de coluna, validador, normalizador). """
+        return compile_layout(self)
 
     def __post_init__(self) -> None:
         if self.header_row < 1:
@@ -131,17 +222,31 @@ class AppConfig:
         self.active_layout = name
 
 def save_config(config: AppConfig, path: Path) -> None:
-    """Salva a configuração em um arquivo TOML."""
-    with path.open("wb") as f:
-        tomli_w.dump(dataclasses.asdict(config), f)
+    """
+    Salva a configuração em um arquivo TOML.
 
-def load_config(path: Path) -> AppConfig:
-    """Carrega a configuração de um arquivo TOML."""
-    if not path.exists():
-        return AppConfig()
+    A escrita é atômica: o conteúdo vai para um arquivo temporário no mesmo
+    diretório, que substitui o destino via ``os.replace``. Uma interrupção no
+    meio da gravação nunca deixa um config.toml truncado.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            tomli_w.dump(dataclasses.asdict(config), f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp cria o arquivo com permissão 0600; preserva a do arquivo original
+        mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
 
-    with path.open("rb") as f:
-        data = tomllib.load(f)
+def _parse_config(raw: bytes) -> AppConfig:
+    """Constrói o AppConfig a partir do conteúdo TOML."""
+    data = tomllib.loads(raw.decode("utf-8"))
 
     # Reconstrói os LayoutConfig a partir dos sub-dicts
     layouts = {}
@@ -152,3 +257,47 @@ def load_config(path: Path) -> AppConfig:
         active_layout=data.get("active_layout", "default"),
         layouts=layouts if layouts else {"default": LayoutConfig()}
     )
+
+# Cache em memória: {digest: (AppConfig, {nome: CompiledLayout})}
+_config_cache: dict[str, tuple[AppConfig, dict[str, CompiledLayout]]] = {}
+
+def load_config(path: Path) -> AppConfig:
+    """
+    Carrega a configuração de um arquivo TOML.
+
+    A configuração parseada e os layouts compilados (``CompiledLayout``) são
+    guardados em cache em memória, indexados pelo hash do conteúdo do TOML:
+    enquanto o arquivo não mudar, nem o parse nem a compilação dos layouts
+    são refeitos. O cache guarda as ``CONFIG_CACHE_SIZE`` versões mais
+    recentes. Cada chamada retorna uma cópia independente da configuração.
+    """
+    if not path.exists():
+        return AppConfig()
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    cached = _config_cache.get(digest)
+    if cached is None:
+        config = _parse_config(raw)
+        compiled = {}
+        for name, layout in config.layouts.items():
+            try:
+                compiled[name] = layout.compiled
+            except ValueError:
+                pass  # coluna inválida: o erro aparece quando o layout for usado
+        _cache_put(_config_cache, digest, (config, compiled), CONFIG_CACHE_SIZE)
+    else:
+        config, compiled = cached
+
+    # Cópia independente: o chamador pode alterar a configuração à vontade.
+    # CompiledLayout é imutável e pode ser compartilhado.
+    config = copy.deepcopy(config)
+
+    # Semeia o cache de compilação: acessos a layout.compiled não recompilam
+    for name, layout_compiled in compiled.items():
+        key = dataclasses.astuple(config.layouts[name])
+        if key not in _compiled_layouts:
+            _cache_put(_compiled_layouts, key, layout_compiled, COMPILED_CACHE_SIZE)
+
+    return config
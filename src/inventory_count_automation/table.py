@@ -0,0 +1,138 @@
+from array import array
+from collections.abc import Iterator
+from enum import IntEnum
+import threading
+
+
+class Status(IntEnum):
+    """Situação de um barcode após o match com a planilha."""
+    PENDING = 0      # ainda não passou pelo match
+    MATCHED = 1      # contado e encontrado na planilha
+    NOT_FOUND = 2    # contado, mas ausente na planilha
+    UNCOUNTED = 3    # presente na planilha, mas não contado
+
+
+class BarcodeRecord:
+    """Visão de um registro da tabela (criada sob demanda, não armazenada)."""
+    __slots__ = ("id", "barcode", "row", "qty", "status")
+
+    def __init__(self, id: int, barcode: str, row: int | None, qty: int, status: Status) -> None:
+        self.id = id
+        self.barcode = barcode
+        self.row = row
+        self.qty = qty
+        self.status = status
+
+    def __repr__(self) -> str:
+        return (
+            f"BarcodeRecord(id={self.id}, barcode={self.barcode!r}, "
+            f"row={self.row}, qty={self.qty}, status={self.status.name})"
+        )
+
+
+class BarcodeTable:
+    """
+    Tabela de barcodes internados compartilhada por reader, counter e excel_handler.
+
+    Cada barcode distinto é guardado uma única vez e recebe um id sequencial;
+    linha na planilha, quantidade e status ficam em ``array`` paralelos
+    indexados por esse id. As listas de barcodes lidas, o dicionário de
+    contagem e o índice da planilha passam a referenciar a mesma instância
+    de cada string, em vez de manter cópias próprias.
+
+    É opcional: internar cada leitura custa uma consulta ao dicionário por
+    linha lida, então o CLI não a utiliza; serve a quem consulta os
+    registros por código (ver ``session``). A inserção de novos barcodes é
+    protegida por lock, permitindo o uso da mesma tabela por várias threads.
+    """
+    __slots__ = ("_ids", "_keys", "_row", "_qty", "_status", "_lock")
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._keys: list[str] = []
+        self._row = array("q")      # 0 = sem linha na planilha
+        self._qty = array("q")
+        self._status = array("b")
+        self._lock = threading.Lock()
+
+    def intern(self, barcode: str) -> str:
+        """Retorna a instância canônica de ``barcode``, registrando-o se for novo."""
+        barcode_id = self._ids.get(barcode)
+        if barcode_id is None:
+            barcode_id = self._insert(barcode)
+        return self._keys[barcode_id]
+
+    def id_of(self, barcode: str) -> int:
+        """Retorna o id de ``barcode``, registrando-o se for novo."""
+        barcode_id = self._ids.get(barcode)
+        if barcode_id is None:
+            barcode_id = self._insert(barcode)
+        return barcode_id
+
+    def _insert(self, barcode: str) -> int:
+        with self._lock:
+            barcode_id = self._ids.get(barcode)
+            if barcode_id is None:
+                barcode_id = len(self._keys)
+                self._keys.append(barcode)
+                self._row.append(0)
+                self._qty.append(0)
+                self._status.append(Status.PENDING)
+                self._ids[barcode] = barcode_id
+        return barcode_id
+
+    def add_qty(self, barcode: str, qty: int = 1) -> None:
+        self._qty[self.id_of(barcode)] += qty
+
+    def set_row(self, barcode: str, row: int) -> None:
+        self._row[self.id_of(barcode)] = row
+
+    def set_status(self, barcode: str, status: Status) -> None:
+        self._status[self.id_of(barcode)] = status
+
+    def reset_counts(self) -> None:
+        """Zera quantidades e status, mantendo os barcodes e as linhas da planilha."""
+        with self._lock:
+            size = len(self._keys)
+            self._qty = array("q", bytes(8 * size))
+            self._status = array("b", bytes(size))
+
+    def record(self, barcode: str) -> BarcodeRecord:
+        """Retorna o registro de ``barcode``. Lança KeyError se não existir."""
+        return self._record(self._ids[barcode])
+
+    def _record(self, barcode_id: int) -> BarcodeRecord:
+        return BarcodeRecord(
+            id=barcode_id,
+            barcode=self._keys[barcode_id],
+            row=self._row[barcode_id] or None,
+            qty=self._qty[barcode_id],
+            status=Status(self._status[barcode_id]),
+        )
+
+    # ── Visões compatíveis com a API antiga (dict/list) ──────────────────
+
+    def counted(self) -> dict[str, int]:
+        """{barcode: quantidade} dos barcodes contados, ordenado por barcode."""
+        keys, qty = self._keys, self._qty
+        return dict(sorted((keys[i], qty[i]) for i in range(len(keys)) if qty[i]))
+
+    def index(self) -> dict[str, int]:
+        """{barcode: linha} dos barcodes presentes na planilha."""
+        keys, row = self._keys, self._row
+        return {keys[i]: row[i] for i in range(len(keys)) if row[i]}
+
+    def with_status(self, status: Status) -> list[str]:
+        """Barcodes com o status informado, na ordem em que foram registrados."""
+        keys = self._keys
+        return [keys[i] for i, s in enumerate(self._status) if s == status]
+
+    def __iter__(self) -> Iterator[BarcodeRecord]:
+        for barcode_id in range(len(self._keys)):
+            yield self._record(barcode_id)
+
+    def __contains__(self, barcode: object) -> bool:
+        return barcode in self._ids
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,35 @@
+"""Configuração compartilhada dos testes: camada opcional de performance (tests/perf)."""
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("perf", "testes de performance")
+    group.addoption(
+        "--run-perf",
+        action="store_true",
+        help="executa os testes marcados com @pytest.mark.perf (dados grandes gerados, minutos)",
+    )
+    group.addoption(
+        "--perf-update-baseline",
+        action="store_true",
+        help="grava as medições como nova referência em tests/perf/baseline.json",
+    )
+    group.addoption(
+        "--perf-report",
+        metavar="ARQUIVO",
+        help="grava o comparativo com a referência em ARQUIVO (JSON)",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "perf: teste de performance com dados grandes (requer --run-perf)")
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    if config.getoption("--run-perf"):
+        return
+    skip = pytest.mark.skip(reason="teste de performance: use --run-perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
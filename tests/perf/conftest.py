@@ -0,0 +1,269 @@
+"""
+Infraestrutura dos testes de performance (opcionais, ``--run-perf``).
+
+Os dados são gerados uma vez por sessão com os geradores do ``benchmark``
+(padrão: 1.000.000 leituras e 100.000 linhas de planilha; ajustável com
+PERF_LINES / PERF_ROWS). Para tolerar máquinas diferentes e variações de
+carga durante a sessão, o tempo de cada etapa é dividido pelo tempo de uma
+carga fixa de calibração medida imediatamente antes dela, e tempo e pico de
+memória são normalizados por unidade de entrada (leitura ou linha). Cada etapa é comparada com ``baseline.json``:
+
+    tempo relativo ≤ referência × TIME_TOLERANCE
+    pico por unidade ≤ referência × MEMORY_TOLERANCE
+
+A referência só vale para a versão do Python em que foi gravada (major.minor,
+em ``meta.python``): com outra versão, essa comparação é pulada e um aviso
+pede para gravar uma nova referência. Independente da referência, toda
+etapa precisa ficar abaixo dos limites absolutos de ``STAGE_LIMITS`` (mesmas
+unidades normalizadas, com folga para diferenças entre versões do Python).
+
+Uso:
+
+    pytest --run-perf tests/perf                          # compara com a referência
+    pytest --run-perf tests/perf --perf-update-baseline   # grava nova referência
+    pytest --run-perf tests/perf --perf-report perf.json  # comparativo em JSON
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+import dataclasses
+import json
+import os
+import platform
+import time
+import warnings
+
+import pytest
+
+from inventory_count_automation.benchmark import Measurement, generate_scan_files, generate_workbook, measure
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Folga sobre a referência antes de considerar regressão
+TIME_TOLERANCE = 2.0
+MEMORY_TOLERANCE = 1.25
+
+DEFAULT_LINES = 1_000_000
+DEFAULT_ROWS = 100_000
+
+# Limites por etapa válidos em qualquer versão do Python:
+# (tempo relativo máximo, pico máximo em bytes por unidade).
+# Cerca de 3× o tempo e 1,6× a memória da referência gravada no 3.13.
+STAGE_LIMITS: dict[str, tuple[float, float]] = {
+    "leitura": (20.0, 110.0),
+    "leitura (BarcodeTable)": (55.0, 40.0),
+    "contagem": (16.0, 26.0),
+    "carga e indexação da planilha": (1000.0, 900.0),
+    "atribuição e gravação": (1300.0, 470.0),
+    "indexação (10% das linhas)": (800.0, 820.0),
+    "indexação (100% das linhas)": (650.0, 900.0),
+}
+
+
+@dataclasses.dataclass
+class StageResult:
+    """Medição de uma etapa, normalizada para comparação entre máquinas."""
+    name: str
+    units: int
+    seconds: float
+    calibration: float
+    peak_bytes: int
+    relative_time: float      # segundos / calibração, por milhão de unidades
+    peak_per_unit: float      # bytes de pico por unidade
+    baseline: dict | None = None
+
+    @property
+    def time_ratio(self) -> float | None:
+        return self.relative_time / self.baseline["relative_time"] if self.baseline else None
+
+    @property
+    def memory_ratio(self) -> float | None:
+        return self.peak_per_unit / self.baseline["peak_per_unit"] if self.baseline else None
+
+
+@dataclasses.dataclass
+class PerfData:
+    txt_dir: Path
+    planilha: Path
+    lines: int
+    rows: int
+
+
+class PerfRecorder:
+    """Acumula as medições da sessão e verifica cada uma contra a referência."""
+
+    def __init__(self, baseline: dict, update: bool) -> None:
+        self.baseline = baseline
+        self.update = update
+        self.results: dict[str, StageResult] = {}
+        self.mismatch = ""
+
+        recorded = baseline.get("meta", {}).get("python")
+        if recorded and not update and _minor(recorded) != _minor(platform.python_version()):
+            # Tempos e memória mudam entre versões do interpretador: comparar não faz sentido
+            self.mismatch = (
+                f"referência gravada no Python {recorded}, executando no {platform.python_version()}: "
+                "etapas verificadas só contra STAGE_LIMITS; grave uma nova referência com --perf-update-baseline"
+            )
+            self.baseline = {}
+            warnings.warn(self.mismatch, pytest.PytestWarning, stacklevel=2)
+
+    @property
+    def calibration(self) -> float:
+        """Menor calibração da sessão."""
+        return min(r.calibration for r in self.results.values())
+
+    def record(self, name: str, m: Measurement, units: int, calibration: float) -> StageResult:
+        result = StageResult(
+            name=name,
+            units=units,
+            seconds=m.seconds,
+            calibration=calibration,
+            peak_bytes=m.peak_bytes,
+            relative_time=m.seconds / calibration / units * 1e6,
+            peak_per_unit=m.peak_bytes / units,
+            baseline=self.baseline.get("stages", {}).get(name),
+        )
+        self.results[name] = result
+
+        assert name in STAGE_LIMITS, f"{name}: etapa sem limite absoluto em STAGE_LIMITS"
+        max_time, max_peak = STAGE_LIMITS[name]
+        assert result.relative_time <= max_time, (
+            f"{name}: tempo relativo {result.relative_time:.1f} acima do limite absoluto {max_time:g}"
+        )
+        assert result.peak_per_unit <= max_peak, (
+            f"{name}: pico de {result.peak_per_unit:.1f} bytes/unidade acima do limite absoluto {max_peak:g}"
+        )
+
+        if result.baseline is not None and not self.update:
+            assert result.time_ratio <= TIME_TOLERANCE, (
+                f"{name}: {result.time_ratio:.2f}× o tempo de referência (limite {TIME_TOLERANCE}×)"
+            )
+            assert result.memory_ratio <= MEMORY_TOLERANCE, (
+                f"{name}: {result.memory_ratio:.2f}× o pico de memória de referência (limite {MEMORY_TOLERANCE}×)"
+            )
+        return result
+
+    def as_baseline(self, data: PerfData) -> dict:
+        return {
+            "meta": {
+                "lines": data.lines,
+                "rows": data.rows,
+                "calibration_seconds": self.calibration,
+                "python": platform.python_version(),
+            },
+            "stages": {
+                name: {"relative_time": r.relative_time, "peak_per_unit": r.peak_per_unit}
+                for name, r in self.results.items()
+            },
+        }
+
+    def report(self) -> dict:
+        return {
+            "calibration_seconds": self.calibration,
+            "stages": [
+                {
+                    **dataclasses.asdict(r),
+                    "time_ratio": r.time_ratio,
+                    "memory_ratio": r.memory_ratio,
+                }
+                for r in self.results.values()
+            ],
+        }
+
+
+def _minor(version: str) -> tuple[str, ...]:
+    """'3.13.5' → ('3', '13')."""
+    return tuple(version.split(".")[:2])
+
+
+_recorder_key = pytest.StashKey[PerfRecorder]()
+_data_key = pytest.StashKey[PerfData]()
+
+
+def _calibrate(repeat: int = 5) -> float:
+    """Carga fixa de CPU e alocação semelhante à leitura e contagem (melhor de ``repeat``)."""
+    words = [f" mcs000prod{i:07d}\n" for i in range(200_000)]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts: dict[str, int] = {}
+        for word in words:
+            key = word.strip().upper()
+            counts[key] = counts.get(key, 0) + 1
+        sorted(counts)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.fixture(scope="session")
+def perf_data(tmp_path_factory: pytest.TempPathFactory, request: pytest.FixtureRequest) -> PerfData:
+    lines = int(os.environ.get("PERF_LINES", DEFAULT_LINES))
+    rows = int(os.environ.get("PERF_ROWS", DEFAULT_ROWS))
+    workdir = tmp_path_factory.mktemp("perf")
+    data = PerfData(
+        txt_dir=workdir / "txt",
+        planilha=workdir / "planilha.xlsx",
+        lines=lines,
+        rows=rows,
+    )
+    generate_scan_files(data.txt_dir, lines, distinct=rows)
+    generate_workbook(data.planilha, rows)
+    request.config.stash[_data_key] = data
+    return data
+
+
+@pytest.fixture(scope="session")
+def perf_recorder(request: pytest.FixtureRequest) -> PerfRecorder:
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+    recorder = PerfRecorder(baseline, request.config.getoption("--perf-update-baseline"))
+    request.config.stash[_recorder_key] = recorder
+    return recorder
+
+
+@pytest.fixture
+def perf_measure(perf_recorder: PerfRecorder) -> Callable[..., tuple[object, StageResult]]:
+    """measure(nome, unidades, fn, *args, repeat=1) → (valor, StageResult) com verificação."""
+    def run(name: str, units: int, fn, *args, repeat: int = 1, **kwargs) -> tuple[object, StageResult]:
+        calibration = _calibrate()
+        value, m = measure(name, fn, *args, repeat=repeat, **kwargs)
+        return value, perf_recorder.record(name, m, units, calibration)
+    return run
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    config = session.config
+    recorder = config.stash.get(_recorder_key, None)
+    if recorder is None or not recorder.results:
+        return
+
+    if recorder.update:
+        BASELINE_PATH.write_text(
+            json.dumps(recorder.as_baseline(config.stash[_data_key]), indent=2) + "\n",
+            encoding="utf-8",
+        )
+
+    report_path = config.getoption("--perf-report")
+    if report_path:
+        Path(report_path).write_text(json.dumps(recorder.report(), indent=2) + "\n", encoding="utf-8")
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    recorder = config.stash.get(_recorder_key, None)
+    if recorder is None or not recorder.results:
+        return
+
+    write = terminalreporter.write_line
+    terminalreporter.section("performance")
+    if recorder.mismatch:
+        write(f"⚠️  {recorder.mismatch}", yellow=True)
+    write(f"{'Etapa':<36} {'Tempo':>8} {'Calib.':>8} {'x ref':>7} {'Pico':>10} {'x ref':>7}")
+    for r in recorder.results.values():
+        time_ratio = f"{r.time_ratio:.2f}" if r.time_ratio is not None else "-"
+        memory_ratio = f"{r.memory_ratio:.2f}" if r.memory_ratio is not None else "-"
+        write(
+            f"{r.name:<36} {r.seconds:>7.2f}s {r.calibration * 1000:>6.1f}ms {time_ratio:>7} "
+            f"{r.peak_bytes / 2**20:>7.1f}MiB {memory_ratio:>7}"
+        )
+    if recorder.update:
+        write(f"referência gravada em {BASELINE_PATH}")
@@ -0,0 +1,68 @@
+"""Testes de performance por etapa com dados grandes (requer --run-perf)."""
+
+from pathlib import Path
+
+import pytest
+
+import inventory_count_automation.excel_handler as excel_handler
+from inventory_count_automation.benchmark import BENCH_LAYOUT, generate_workbook
+from inventory_count_automation.counter import count_barcodes
+from inventory_count_automation.excel_handler import assign_balances, load_indexed_workbook
+from inventory_count_automation.reader import read_all_barcodes
+from inventory_count_automation.table import BarcodeTable
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.fixture(scope="module")
+def barcodes(perf_data) -> list[str]:
+    return read_all_barcodes(BENCH_LAYOUT, perf_data.txt_dir).barcodes
+
+
+class TestStages:
+    def test_read(self, perf_data, perf_measure) -> None:
+        result, _ = perf_measure("leitura", perf_data.lines, read_all_barcodes, BENCH_LAYOUT, perf_data.txt_dir, repeat=5)
+        assert len(result.barcodes) == perf_data.lines
+
+    def test_read_with_table(self, perf_data, perf_measure) -> None:
+        perf_measure(
+            "leitura (BarcodeTable)", perf_data.lines,
+            lambda: read_all_barcodes(BENCH_LAYOUT, perf_data.txt_dir, table=BarcodeTable()),
+            repeat=5,
+        )
+
+    def test_count(self, perf_data, perf_measure, barcodes: list[str]) -> None:
+        counted, _ = perf_measure("contagem", perf_data.lines, count_barcodes, barcodes, repeat=5)
+        assert sum(counted.values()) == perf_data.lines
+
+    def test_index(self, perf_data, perf_measure) -> None:
+        indexed, _ = perf_measure("carga e indexação da planilha", perf_data.rows, load_indexed_workbook, BENCH_LAYOUT, perf_data.planilha, repeat=2)
+        assert len(indexed.index) == perf_data.rows
+
+    def test_assign(self, perf_data, perf_measure, barcodes: list[str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        indexed = load_indexed_workbook(BENCH_LAYOUT, perf_data.planilha)
+        counted = count_barcodes(barcodes)
+
+        # Com a planilha e o índice já carregados, a atribuição não pode reabrir o arquivo
+        def no_reload(*args, **kwargs):
+            pytest.fail("assign_balances recarregou a planilha")
+        monkeypatch.setattr(excel_handler.openpyxl, "load_workbook", no_reload)
+
+        result, _ = perf_measure(
+            "atribuição e gravação", perf_data.rows, assign_balances,
+            BENCH_LAYOUT, counted, wb=indexed.wb, save_path=tmp_path / "saida.xlsx", barcode_index=indexed.index,
+        )
+        assert len(result["matched"]) + len(result["not_found"]) == len(counted)
+
+
+class TestScaling:
+    def test_index_is_linear(self, perf_data, perf_measure, tmp_path: Path) -> None:
+        """Tempo por linha na indexação praticamente constante entre 10% e 100% das linhas."""
+        small_rows = perf_data.rows // 10
+        small = generate_workbook(tmp_path / "pequena.xlsx", small_rows)
+
+        _, small_result = perf_measure("indexação (10% das linhas)", small_rows, load_indexed_workbook, BENCH_LAYOUT, small, repeat=3)
+        _, full_result = perf_measure("indexação (100% das linhas)", perf_data.rows, load_indexed_workbook, BENCH_LAYOUT, perf_data.planilha, repeat=3)
+
+        # Um índice quadrático seria ~10× mais lento por linha
+        assert full_result.relative_time < 2.5 * small_result.relative_time
@@ -0,0 +1,131 @@
+"""Testes para o módulo anomaly."""
+
+import itertools
+import random
+from pathlib import Path
+
+import pytest
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.anomaly import BurstDetector, print_bursts
+from inventory_count_automation.counter import count_barcodes
+from inventory_count_automation.provenance import Provenance
+from inventory_count_automation.reader import read_all_barcodes
+
+
+def _naive_runs(barcodes: list[str], threshold: int) -> list[tuple[str, int, int]]:
+    """Referência: (barcode, início 1-based, tamanho) de todas as sequências >= threshold."""
+    runs, pos = [], 0
+    for barcode, group in itertools.groupby(barcodes):
+        length = len(list(group))
+        if length >= threshold:
+            runs.append((barcode, pos + 1, length))
+        pos += length
+    return runs
+
+
+class TestBurstDetector:
+    def test_flags_long_run(self) -> None:
+        barcodes = ["A", "B"] + ["C"] * 10 + ["D"]
+        detector = BurstDetector(threshold=5)
+        detector.scan(Path("f.txt"), barcodes)
+
+        assert [(b.barcode, b.start_read, b.length, b.kept) for b in detector.bursts] == [("C", 3, 10, 10)]
+        assert len(barcodes) == 13  # sem corte, nada é removido
+
+    def test_ignores_short_runs(self) -> None:
+        detector = BurstDetector(threshold=5)
+        detector.scan(Path("f.txt"), ["A"] * 4 + ["B"] * 4)
+        assert detector.bursts == []
+
+    def test_run_at_end_of_file(self) -> None:
+        detector = BurstDetector(threshold=4)
+        detector.scan(Path("f.txt"), ["A", "B"] + ["C"] * 4)
+        assert [(b.start_read, b.length) for b in detector.bursts] == [(3, 4)]
+
+    def test_cap_trims_excess_reads(self) -> None:
+        barcodes = ["A"] + ["B"] * 8 + ["C"] + ["D"] * 6
+        detector = BurstDetector(threshold=5, cap=2)
+        detector.scan(Path("f.txt"), barcodes)
+
+        assert barcodes == ["A", "B", "B", "C", "D", "D"]
+        assert detector.discarded == 10
+        assert count_barcodes(barcodes) == {"A": 1, "B": 2, "C": 1, "D": 2}
+
+    def test_cap_returns_removed_ranges(self) -> None:
+        barcodes = ["A"] + ["B"] * 8 + ["C"] + ["D"] * 6
+        removed = BurstDetector(threshold=5, cap=2).scan(Path("f.txt"), barcodes)
+        assert removed == [(3, 9), (12, 16)]
+
+    def test_stats_per_file(self) -> None:
+        detector = BurstDetector(threshold=4)
+        detector.scan(Path("a.txt"), ["X"] * 6 + ["Y", "Z"])
+        detector.scan(Path("b.txt"), ["Y", "Z"])
+
+        a, b = detector.stats
+        assert (a.barcodes, a.bursts, a.burst_reads, a.max_burst) == (8, 1, 6, 6)
+        assert a.burst_rate == pytest.approx(6 / 8)
+        assert (b.bursts, b.burst_rate) == (0, 0.0)
+
+    def test_print_shows_stats_of_files_with_bursts(self, capsys: pytest.CaptureFixture[str]) -> None:
+        detector = BurstDetector(threshold=4)
+        detector.scan(Path("a.txt"), ["X"] * 6 + ["Y", "Z"])
+        detector.scan(Path("b.txt"), ["Y", "Z"])
+
+        print_bursts(detector)
+
+        out = capsys.readouterr().out
+        assert "a.txt: 75.0% das 8 leituras em 1 sequência(s) (maior: 6)" in out
+        assert "b.txt" not in out
+
+    @pytest.mark.parametrize("threshold", [2, 3, 7, 50])
+    def test_matches_exhaustive_scan(self, threshold: int) -> None:
+        rng = random.Random(threshold)
+        barcodes: list[str] = []
+        while len(barcodes) < 5000:
+            length = rng.choice([1, 1, 1, 2, threshold - 1, threshold, threshold + 3, 3 * threshold])
+            barcodes.extend([f"P{rng.randrange(5)}"] * length)
+
+        detector = BurstDetector(threshold=threshold)
+        detector.scan(Path("f.txt"), list(barcodes))
+
+        found = [(b.barcode, b.start_read, b.length) for b in detector.bursts]
+        assert found == _naive_runs(barcodes, threshold)
+
+    @pytest.mark.parametrize(("threshold", "cap"), [(1, None), (5, 0)])
+    def test_invalid_parameters(self, threshold: int, cap: int | None) -> None:
+        with pytest.raises(ValueError):
+            BurstDetector(threshold=threshold, cap=cap)
+
+
+class TestReaderIntegration:
+    def test_runs_do_not_span_files(self, tmp_path: Path) -> None:
+        (tmp_path / "a.txt").write_text("MCS000X\n" * 3, encoding="utf-8")
+        (tmp_path / "b.txt").write_text("MCS000X\n" * 3, encoding="utf-8")
+        detector = BurstDetector(threshold=4)
+
+        result = read_all_barcodes(LayoutConfig(barcode_prefix="MCS000"), tmp_path, detector=detector)
+
+        assert len(result.barcodes) == 6
+        assert detector.bursts == []
+        assert result.anomalies is detector
+
+    def test_cap_applies_to_counts(self, tmp_path: Path) -> None:
+        (tmp_path / "a.txt").write_text("MCS000X\n" * 200 + "linha_invalida\nMCS000Y\n", encoding="utf-8")
+        detector = BurstDetector(threshold=100, cap=1)
+
+        result = read_all_barcodes(LayoutConfig(barcode_prefix="MCS000"), tmp_path, detector=detector)
+
+        assert count_barcodes(result.barcodes) == {"MCS000X": 1, "MCS000Y": 1}
+        assert result.rejected.most_common() == [("linha_invalida", 1)]
+
+    def test_cap_applies_to_provenance(self, tmp_path: Path) -> None:
+        (tmp_path / "a.txt").write_text("MCS000Y\n" + "MCS000X\n" * 200 + "MCS000Y\n", encoding="utf-8")
+        detector = BurstDetector(threshold=100, cap=2)
+        provenance = Provenance()
+
+        result = read_all_barcodes(LayoutConfig(barcode_prefix="MCS000"), tmp_path, provenance, detector=detector)
+
+        assert count_barcodes(result.barcodes) == {"MCS000X": 2, "MCS000Y": 2}
+        assert [occ.line for occ in provenance.locate("MCS000X")] == [2, 3]
+        assert [occ.line for occ in provenance.locate("MCS000Y")] == [1, 202]
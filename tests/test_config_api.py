@@ -0,0 +1,200 @@
+"""Testes para o módulo config_api."""
+
+from pathlib import Path
+import json
+
+import pytest
+
+import inventory_count_automation.settings as settings
+from inventory_count_automation.__main__ import main
+from inventory_count_automation.config_api import (
+    ConfigPatchError,
+    add_layout,
+    apply_patch,
+    build_layout,
+    edit_layout,
+    import_patch,
+    load_patch,
+    validate_config,
+)
+from inventory_count_automation.settings import AppConfig, LayoutConfig, load_config, save_config
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_cache() -> None:
+    settings._config_cache.clear()
+
+@pytest.fixture
+def config() -> AppConfig:
+    return AppConfig(
+        active_layout="loja",
+        layouts={"loja": LayoutConfig(col_chave_busca="H", col_qtd_fisico="J", barcode_prefix="MCS000")},
+    )
+
+@pytest.fixture
+def config_path(tmp_path: Path, config: AppConfig) -> Path:
+    path = tmp_path / "config.toml"
+    save_config(config, path)
+    return path
+
+
+class TestBuildLayout:
+    def test_applies_fields_over_defaults(self) -> None:
+        layout = build_layout({"col_chave_busca": "h", "barcode_prefix": "abc"})
+        assert layout.col_chave_busca == "H"
+        assert layout.barcode_prefix == "abc"  # só colunas são normalizadas
+        assert layout.col_qtd_fisico == LayoutConfig().col_qtd_fisico
+
+    def test_applies_fields_over_base(self) -> None:
+        base = LayoutConfig(col_chave_busca="H", description="base")
+        assert build_layout({"col_qtd_fisico": "K"}, base=base).description == "base"
+
+    @pytest.mark.parametrize("fields, message", [
+        ({"foo": 1}, "desconhecido"),
+        ({"header_row": "1"}, "header_row deve ser do tipo int"),
+        ({"header_row": True}, "header_row deve ser do tipo int"),
+        ({"col_sku": "1"}, "col_sku: coluna inválida"),
+        ({"header_row": 3, "data_start_row": 2}, "data_start_row"),
+    ])
+    def test_invalid_fields(self, fields: dict, message: str) -> None:
+        with pytest.raises(ValueError, match=message):
+            build_layout(fields)
+
+
+class TestAddEdit:
+    def test_add_and_edit(self, config: AppConfig) -> None:
+        add_layout(config, "nova", {"col_chave_busca": "B"})
+        edit_layout(config, "nova", {"col_qtd_fisico": "C"})
+        assert config.layouts["nova"].col_chave_busca == "B"
+        assert config.layouts["nova"].col_qtd_fisico == "C"
+
+    def test_add_existing_raises(self, config: AppConfig) -> None:
+        with pytest.raises(ValueError):
+            add_layout(config, "loja", {})
+
+    def test_edit_missing_raises(self, config: AppConfig) -> None:
+        with pytest.raises(KeyError):
+            edit_layout(config, "nao_existe", {})
+
+
+class TestApplyPatch:
+    def test_adds_edits_removes_and_activates(self, config: AppConfig) -> None:
+        config.add_layout("velho", LayoutConfig())
+        patch = {
+            "active_layout": "nova",
+            "layouts": {"loja": {"col_qtd_fisico": "K"}, "nova": {"col_chave_busca": "B"}},
+            "remove_layouts": ["velho"],
+        }
+        result = apply_patch(config, patch)
+
+        assert list(result.layouts) == ["loja", "nova"]
+        assert result.layouts["loja"].col_chave_busca == "H"
+        assert result.layouts["loja"].col_qtd_fisico == "K"
+        assert result.active_layout == "nova"
+        assert "velho" in config.layouts  # original intacto
+
+    def test_replace_starts_from_defaults(self, config: AppConfig) -> None:
+        result = apply_patch(config, {"layouts": {"loja": {"col_qtd_fisico": "K"}}}, replace=True)
+        assert result.layouts["loja"].col_chave_busca == LayoutConfig().col_chave_busca
+
+    def test_reports_all_errors_at_once(self, config: AppConfig) -> None:
+        patch = {
+            "active_layout": "x",
+            "layouts": {"a": {"header_row": 0}, "b": {"col_sku": "?"}, "c": {"col_sku": "D"}},
+            "extra": 1,
+        }
+        with pytest.raises(ConfigPatchError) as info:
+            apply_patch(config, patch)
+
+        assert len(info.value.errors) == 4
+        assert any(e.startswith("layouts.a:") for e in info.value.errors)
+        assert any(e.startswith("layouts.b:") for e in info.value.errors)
+        assert any(e.startswith("active_layout:") for e in info.value.errors)
+        assert any(e.startswith("extra:") for e in info.value.errors)
+
+    @pytest.mark.parametrize("patch, prefix", [
+        ({"active_layout": ["loja"]}, "active_layout:"),
+        ({"remove_layouts": "default"}, "remove_layouts:"),
+        ({"remove_layouts": [1]}, "remove_layouts:"),
+    ])
+    def test_rejects_wrong_types(self, config: AppConfig, patch: dict, prefix: str) -> None:
+        with pytest.raises(ConfigPatchError) as info:
+            apply_patch(config, patch)
+
+        assert len(info.value.errors) == 1
+        assert info.value.errors[0].startswith(prefix)
+
+
+class TestImport:
+    def test_json_and_toml_patches(self, tmp_path: Path) -> None:
+        (tmp_path / "p.json").write_text(json.dumps({"layouts": {"a": {"col_sku": "C"}}}))
+        (tmp_path / "p.toml").write_text('[layouts.a]\ncol_sku = "C"\n')
+        assert load_patch(tmp_path / "p.json") == load_patch(tmp_path / "p.toml")
+
+    def test_invalid_patch_file(self, tmp_path: Path) -> None:
+        (tmp_path / "p.json").write_text("[1, 2]")
+        with pytest.raises(ValueError):
+            load_patch(tmp_path / "p.json")
+        with pytest.raises(FileNotFoundError):
+            load_patch(tmp_path / "nao_existe.toml")
+
+    def test_bulk_import_writes_once(self, config_path: Path, tmp_path: Path) -> None:
+        patch = {"layouts": {f"loja-{i:03d}": {"col_chave_busca": "H", "col_qtd_fisico": "J"} for i in range(300)}}
+        (tmp_path / "p.json").write_text(json.dumps(patch))
+
+        import_patch(tmp_path / "p.json", config_path)
+
+        config = load_config(config_path)
+        assert len(config.layouts) == 301
+        assert validate_config(config) == []
+
+    def test_invalid_import_does_not_write(self, config_path: Path, tmp_path: Path) -> None:
+        original = config_path.read_bytes()
+        (tmp_path / "p.json").write_text(json.dumps({"layouts": {"a": {}, "b": {"header_row": 0}}}))
+
+        with pytest.raises(ConfigPatchError):
+            import_patch(tmp_path / "p.json", config_path)
+        assert config_path.read_bytes() == original
+
+
+class TestLayoutCommand:
+    def run(self, config_path: Path, *args: str) -> int:
+        with pytest.raises(SystemExit) as info:
+            main(["layout", "--config", str(config_path), *args])
+        return info.value.code
+
+    def test_add_with_flags_and_activate(self, config_path: Path) -> None:
+        code = self.run(config_path, "add", "nova", "--col-chave-busca", "b", "--header-row", "2",
+                        "--data-start-row", "3", "--activate")
+        config = load_config(config_path)
+
+        assert code == 0
+        assert config.active_layout == "nova"
+        assert config.active.col_chave_busca == "B"
+        assert config.active.data_start_row == 3
+
+    def test_edit_from_file(self, config_path: Path, tmp_path: Path) -> None:
+        (tmp_path / "campos.toml").write_text('col_qtd_fisico = "K"\ndescription = "arquivo"\n')
+        code = self.run(config_path, "edit", "loja", "--from-file", str(tmp_path / "campos.toml"),
+                        "--description", "opção")
+        layout = load_config(config_path).layouts["loja"]
+
+        assert code == 0
+        assert layout.col_qtd_fisico == "K"
+        assert layout.description == "opção"
+
+    def test_validation_error_exit_code(self, config_path: Path, capsys: pytest.CaptureFixture) -> None:
+        original = config_path.read_bytes()
+        assert self.run(config_path, "edit", "loja", "--col-sku", "1") == 1
+        assert "coluna inválida" in capsys.readouterr().out
+        assert config_path.read_bytes() == original
+
+    def test_remove_active_fails(self, config_path: Path) -> None:
+        assert self.run(config_path, "remove", "loja") == 1
+
+    def test_validate_patch_does_not_write(self, config_path: Path, tmp_path: Path) -> None:
+        original = config_path.read_bytes()
+        (tmp_path / "p.json").write_text(json.dumps({"layouts": {"a": {}}}))
+
+        assert self.run(config_path, "validate", str(tmp_path / "p.json")) == 0
+        assert config_path.read_bytes() == original
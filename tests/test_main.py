@@ -0,0 +1,106 @@
+"""Testes para o ponto de entrada (modos --count-only e --merge)."""
+
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+import inventory_count_automation.__main__ as cli_main
+import inventory_count_automation.excel_handler as excel_handler
+import inventory_count_automation.settings as settings
+from inventory_count_automation.settings import AppConfig, LayoutConfig, save_config
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_cache() -> None:
+    settings._config_cache.clear()
+
+@pytest.fixture
+def config_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    layout = LayoutConfig(
+        planilha_filename="planilha.xlsx",
+        col_chave_busca="A",
+        col_qtd_fisico="B",
+        barcode_prefix="MCS000",
+    )
+    path = tmp_path / "config.toml"
+    save_config(AppConfig(active_layout="loja", layouts={"loja": layout}), path)
+    monkeypatch.setattr(cli_main, "CONFIG_PATH", path)
+    return path
+
+@pytest.fixture
+def planilha(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if ws is None:
+        raise RuntimeError("Workbook sem planilha ativa.")
+    ws.append(["Barcode", "QTD Físico"])
+    ws.append(["MCS000PROD001", None])
+    ws.append(["MCS000PROD002", None])
+    path = tmp_path / "planilha.xlsx"
+    wb.save(path)
+    monkeypatch.setattr(excel_handler, "INPUT_PLANILHA_DIR", tmp_path)
+    return path
+
+@pytest.fixture
+def txt_dir(tmp_path: Path) -> Path:
+    directory = tmp_path / "txt"
+    directory.mkdir()
+    (directory / "coletor.txt").write_text(
+        "MCS000PROD001\nMCS000PROD001\nlixo\nMCS000PROD002\n", encoding="utf-8",
+    )
+    return directory
+
+
+def _exit_code(argv: list[str]) -> int:
+    with pytest.raises(SystemExit) as exc:
+        cli_main.main(argv)
+    return exc.value.code
+
+
+class TestCountOnlyAndMerge:
+    def test_count_only_then_merge_fills_workbook(
+        self, config_path: Path, planilha: Path, txt_dir: Path, tmp_path: Path,
+    ) -> None:
+        output = tmp_path / "parcial.json.gz"
+
+        cli_main.main(["--count-only", str(txt_dir), "--node", "predio-a", "-o", str(output)])
+        cli_main.main(["--merge", str(output)])
+
+        ws = openpyxl.load_workbook(planilha).active
+        assert ws is not None
+        assert [ws["B2"].value, ws["B3"].value] == [2, 1]
+
+    @pytest.mark.parametrize("flag", ["--provenance", "--pipeline"])
+    def test_count_only_refuses_ignored_flags(
+        self, config_path: Path, txt_dir: Path, tmp_path: Path, flag: str,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        output = tmp_path / "parcial.json.gz"
+
+        assert _exit_code(["--count-only", str(txt_dir), "-o", str(output), flag]) == 1
+        assert f"{flag} não se aplica(m) ao --count-only" in capsys.readouterr().out
+        assert not output.exists()
+
+    @pytest.mark.parametrize("flag", ["--provenance", "--pipeline"])
+    def test_merge_refuses_ignored_flags(
+        self, config_path: Path, tmp_path: Path, flag: str, capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        assert _exit_code(["--merge", str(tmp_path / "parcial.json.gz"), flag]) == 1
+        assert f"{flag} não se aplica(m) ao --merge" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("flag", ["--burst-cap", "--burst-threshold"])
+    def test_merge_refuses_burst_flags(
+        self, config_path: Path, tmp_path: Path, flag: str, capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        assert _exit_code(["--merge", str(tmp_path / "parcial.json.gz"), flag, "5"]) == 1
+        assert "não se aplicam ao --merge" in capsys.readouterr().out
+
+    def test_count_only_accepts_burst_flags(
+        self, config_path: Path, txt_dir: Path, tmp_path: Path,
+    ) -> None:
+        output = tmp_path / "parcial.json.gz"
+
+        cli_main.main(["--count-only", str(txt_dir), "-o", str(output), "--burst-cap", "1"])
+
+        assert output.exists()
@@ -0,0 +1,156 @@
+"""Testes para o módulo partial."""
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.rejected import RejectedLines
+from inventory_count_automation.partial import (
+    PARTIAL_FORMAT,
+    PARTIAL_VERSION,
+    FileSummary,
+    PartialCount,
+    count_directory,
+    load_partial,
+    merge_partials,
+    save_partial,
+)
+
+
+@pytest.fixture
+def layout() -> LayoutConfig:
+    return LayoutConfig(barcode_prefix="MCS000")
+
+@pytest.fixture
+def nodes(tmp_path: Path) -> list[Path]:
+    """Três diretórios simulando os servidores de cada prédio."""
+    contents = [
+        "MCS000PROD001\nMCS000PROD002\nlixo\n",
+        "MCS000PROD001\nMCS000PROD003\n",
+        "MCS000PROD002\nlixo\nMCS000PROD001\n",
+    ]
+    dirs = []
+    for i, content in enumerate(contents, start=1):
+        node_dir = tmp_path / f"predio_{i}"
+        node_dir.mkdir()
+        (node_dir / "coletor.txt").write_text(content, encoding="utf-8")
+        dirs.append(node_dir)
+    return dirs
+
+
+class TestCountDirectory:
+    def test_counts_and_rejected(self, nodes: list[Path], layout: LayoutConfig) -> None:
+        partial = count_directory(layout, nodes[0], node="predio_1")
+
+        assert partial.counts == {"MCS000PROD001": 1, "MCS000PROD002": 1}
+        assert partial.rejected == {"lixo": 1}
+        assert partial.files == [
+            FileSummary("predio_1", str(nodes[0] / "coletor.txt"), barcodes=2, rejected=1)
+        ]
+
+    def test_raises_on_missing_directory(self, tmp_path: Path, layout: LayoutConfig) -> None:
+        with pytest.raises(FileNotFoundError):
+            count_directory(layout, tmp_path / "nao_existe")
+
+
+class TestMerge:
+    def test_merge_sums_counts(self, nodes: list[Path], layout: LayoutConfig) -> None:
+        partials = [count_directory(layout, d, node=d.name) for d in nodes]
+        merged = merge_partials(partials)
+
+        assert merged.counts == {"MCS000PROD001": 3, "MCS000PROD002": 2, "MCS000PROD003": 1}
+        assert merged.rejected == {"lixo": 2}
+        assert [f.node for f in merged.files] == ["predio_1", "predio_2", "predio_3"]
+
+    def test_merge_is_associative(self, nodes: list[Path], layout: LayoutConfig) -> None:
+        a, b, c = (count_directory(layout, d, node=d.name) for d in nodes)
+        assert a.merge(b).merge(c) == a.merge(b.merge(c))
+
+    def test_merge_is_commutative(self, nodes: list[Path], layout: LayoutConfig) -> None:
+        a, b, _ = (count_directory(layout, d, node=d.name) for d in nodes)
+        assert a.merge(b) == b.merge(a)
+
+    def test_rejects_different_filters(self) -> None:
+        with pytest.raises(ValueError):
+            PartialCount("MCS000", "").merge(PartialCount("XYZ", ""))
+
+    def test_merge_keeps_approximate_rejected(self, tmp_path: Path, layout: LayoutConfig) -> None:
+        partials = []
+        for node in ("predio_1", "predio_2"):
+            node_dir = tmp_path / node
+            node_dir.mkdir()
+            noise = "".join(f"{node}-ruido-{i}\n" for i in range(50))
+            (node_dir / "coletor.txt").write_text(noise + "lixo\n" * 20, encoding="utf-8")
+            partial = count_directory(layout, node_dir, node=node, rejected=RejectedLines(limit=4))
+            save_partial(partial, node_dir / "parcial.json.gz")
+            partials.append(load_partial(node_dir / "parcial.json.gz"))
+
+        merged = merge_partials(partials).rejected_lines(limit=4)
+        (first, _), = merged.most_common(1)
+
+        assert merged.approximate
+        assert merged.total == 140
+        assert merged.error_bound >= sum(p.rejected_error_bound for p in partials) > 0
+        assert first == "lixo"
+        assert merged.distinct == pytest.approx(101, rel=0.1)
+
+    def test_rejects_same_partial_twice(self, nodes: list[Path], layout: LayoutConfig) -> None:
+        partial = count_directory(layout, nodes[0], node="predio_1")
+        with pytest.raises(ValueError, match="predio_1"):
+            merge_partials([partial, partial])
+
+    def test_rejects_empty_input(self) -> None:
+        with pytest.raises(ValueError):
+            merge_partials([])
+
+
+class TestPersistence:
+    def test_roundtrip(self, nodes: list[Path], layout: LayoutConfig, tmp_path: Path) -> None:
+        partial = count_directory(layout, nodes[0], node="predio_1")
+        path = tmp_path / "parcial.json.gz"
+
+        save_partial(partial, path)
+        assert load_partial(path) == partial
+
+    def test_rejects_unknown_version(self, tmp_path: Path) -> None:
+        path = tmp_path / "parcial.json.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"format": "inventory-count-partial", "version": 999}, f)
+
+        with pytest.raises(ValueError, match="Versão"):
+            load_partial(path)
+
+    def test_rejects_non_partial_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "contagem.txt"
+        path.write_text("MCS000PROD001\n", encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            load_partial(path)
+
+    def test_rejects_truncated_file(self, nodes: list[Path], layout: LayoutConfig, tmp_path: Path) -> None:
+        path = tmp_path / "parcial.json.gz"
+        save_partial(count_directory(layout, nodes[0], node="predio_1"), path)
+        path.write_bytes(path.read_bytes()[:-10])
+
+        with pytest.raises(ValueError, match="inválido"):
+            load_partial(path)
+
+    @pytest.mark.parametrize("data", [
+        {"barcode_prefix": "", "barcode_suffix": "", "rejected": {}, "files": []},
+        {"barcode_prefix": "", "barcode_suffix": "", "counts": {}, "rejected": {}, "files": [1]},
+        {"barcode_prefix": "", "barcode_suffix": "", "counts": [1], "rejected": {}, "files": []},
+    ])
+    def test_rejects_incomplete_file(self, data: dict, tmp_path: Path) -> None:
+        path = tmp_path / "parcial.json.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"format": PARTIAL_FORMAT, "version": PARTIAL_VERSION, **data}, f)
+
+        with pytest.raises(ValueError, match="incompleta"):
+            load_partial(path)
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        with pytest.raises(FileNotFoundError):
+            load_partial(tmp_path / "nao_existe.json.gz")
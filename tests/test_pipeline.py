@@ -0,0 +1,146 @@
+"""Testes para o módulo pipeline."""
+
+from pathlib import Path
+import time
+
+import openpyxl
+import pytest
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.excel_handler import assign_balances
+import inventory_count_automation.pipeline as pipeline
+from inventory_count_automation.pipeline import StageTiming, overlap, run_pipelined
+from inventory_count_automation.provenance import Provenance
+from inventory_count_automation.table import BarcodeTable
+
+
+def _slow_read(*args):
+    """Leitura que levaria muito mais que o teste tolera, se não fosse interrompida."""
+    time.sleep(30)
+
+
+@pytest.fixture
+def layout() -> LayoutConfig:
+    return LayoutConfig(
+        col_chave_busca="A",
+        col_qtd_fisico="B",
+        header_row=1,
+        data_start_row=2,
+        barcode_prefix="MCS000",
+    )
+
+@pytest.fixture
+def inputs(tmp_path: Path) -> tuple[Path, Path]:
+    """Cria um diretório de .txt e uma planilha com dois produtos."""
+    txt_dir = tmp_path / "txt"
+    txt_dir.mkdir()
+    (txt_dir / "contagem.txt").write_text(
+        "MCS000PROD001\nMCS000PROD001\nMCS000PROD002\nMCS000FANTASMA\n",
+        encoding="utf-8",
+    )
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if ws is None:
+        raise RuntimeError("Workbook sem planilha ativa.")
+    ws["A1"], ws["B1"] = "Barcode", "QTD Físico"
+    ws["A2"], ws["A3"] = "MCS000PROD001", "MCS000PROD002"
+    planilha = tmp_path / "planilha.xlsx"
+    wb.save(planilha)
+
+    return txt_dir, planilha
+
+
+class TestRunPipelined:
+    def test_reads_counts_and_indexes(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        result = run_pipelined(layout, txt_dir, planilha)
+
+        assert result.counted == {"MCS000FANTASMA": 1, "MCS000PROD001": 2, "MCS000PROD002": 1}
+        assert result.indexed.index == {"MCS000PROD001": 2, "MCS000PROD002": 3}
+        assert result.indexed.path == planilha
+
+    def test_assign_with_prebuilt_index(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        result = run_pipelined(layout, txt_dir, planilha)
+
+        balances = assign_balances(
+            layout, result.counted,
+            wb=result.indexed.wb,
+            save_path=result.indexed.path,
+            barcode_index=result.indexed.index,
+        )
+
+        assert balances["not_found"] == ["MCS000FANTASMA"]
+        ws = openpyxl.load_workbook(planilha).active
+        assert ws is not None
+        assert ws["B2"].value == 2
+        assert ws["B3"].value == 1
+
+    def test_records_both_stages(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        result = run_pipelined(layout, txt_dir, planilha)
+
+        assert len(result.timings) == 2
+        assert all(t.end >= t.start >= 0 for t in result.timings)
+
+    def test_returns_filled_accumulators(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        (txt_dir / "contagem.txt").write_text("MCS000PROD001\nlixo\n", encoding="utf-8")
+        result = run_pipelined(layout, txt_dir, planilha, provenance=Provenance())
+
+        assert result.rejected.most_common() == [("lixo", 1)]
+        assert result.provenance is not None
+        assert result.provenance.locate("MCS000PROD001")[0].line == 1
+
+    def test_fills_table(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        table = BarcodeTable()
+        result = run_pipelined(layout, txt_dir, planilha, table=table)
+
+        assert table.counted() == result.counted
+        assert table.index() == result.indexed.index
+
+    def test_reads_in_separate_process(self, inputs, layout: LayoutConfig, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(pipeline.os, "process_cpu_count", lambda: 4)
+        txt_dir, planilha = inputs
+        table = BarcodeTable()
+        result = run_pipelined(layout, txt_dir, planilha, table=table)
+
+        assert result.counted == {"MCS000FANTASMA": 1, "MCS000PROD001": 2, "MCS000PROD002": 1}
+        assert table.counted() == result.counted
+        assert not result.rejected
+
+    def test_process_propagates_missing_txt_dir(self, inputs, layout: LayoutConfig, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(pipeline.os, "process_cpu_count", lambda: 4)
+        txt_dir, planilha = inputs
+        with pytest.raises(FileNotFoundError):
+            run_pipelined(layout, txt_dir / "nao_existe", planilha)
+
+    def test_missing_workbook_stops_reading(self, inputs, layout: LayoutConfig, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(pipeline.os, "process_cpu_count", lambda: 4)
+        monkeypatch.setattr(pipeline, "_read_and_count", _slow_read)
+        txt_dir, planilha = inputs
+
+        start = time.perf_counter()
+        with pytest.raises(FileNotFoundError):
+            run_pipelined(layout, txt_dir, planilha.with_name("nao_existe.xlsx"))
+        assert time.perf_counter() - start < 5
+
+    def test_propagates_missing_workbook(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        with pytest.raises(FileNotFoundError):
+            run_pipelined(layout, txt_dir, planilha.with_name("nao_existe.xlsx"))
+
+    def test_propagates_missing_txt_dir(self, inputs, layout: LayoutConfig) -> None:
+        txt_dir, planilha = inputs
+        with pytest.raises(FileNotFoundError):
+            run_pipelined(layout, txt_dir / "nao_existe", planilha)
+
+
+class TestOverlap:
+    def test_overlapping_stages(self) -> None:
+        assert overlap(StageTiming("a", 0.0, 2.0), StageTiming("b", 1.0, 3.0)) == 1.0
+
+    def test_disjoint_stages(self) -> None:
+        assert overlap(StageTiming("a", 0.0, 1.0), StageTiming("b", 2.0, 3.0)) == 0.0
@@ -0,0 +1,108 @@
+"""Testes para o módulo provenance."""
+
+from pathlib import Path
+
+import pytest
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.provenance import Occurrence, Provenance
+from inventory_count_automation.reader import parse_barcodes_from_file, read_all_barcodes
+from inventory_count_automation.rejected import RejectedLines
+
+
+@pytest.fixture
+def layout() -> LayoutConfig:
+    return LayoutConfig(barcode_prefix="MCS000")
+
+@pytest.fixture
+def tmp_txt_dir(tmp_path: Path) -> Path:
+    """Cria arquivos .txt com conteúdo conhecido para conferir linhas e offsets."""
+    (tmp_path / "coletor_a.txt").write_bytes(
+        b"MCS000PROD001\n"     # offset 0
+        b"linha_invalida\n"    # offset 14
+        b"\n"                  # offset 29
+        b"MCS000PROD001\n"     # offset 30
+    )
+    (tmp_path / "coletor_b.txt").write_bytes(
+        b"MCS000PROD002\r\n"   # offset 0
+        b"mcs000prod001\r\n"   # offset 15
+    )
+    return tmp_path
+
+
+class TestProvenance:
+    def test_record_and_locate(self) -> None:
+        prov = Provenance()
+        file_id = prov.register_file(Path("a.txt"))
+        prov.record("MCS000X", file_id, 3, 42)
+
+        assert prov.locate("MCS000X") == [Occurrence("a.txt", 3, 42)]
+        assert prov.count("MCS000X") == 1
+        assert "MCS000X" in prov
+
+    def test_rejected_keys_are_capped(self) -> None:
+        prov = Provenance()
+        file_id = prov.register_file(Path("a.txt"))
+
+        recorded = [prov.record_rejected(key, file_id, 1, 0, limit=2) for key in ("x", "y", "z", "x")]
+
+        assert recorded == [True, True, False, True]
+        assert (prov.count("x"), "z" in prov, prov.rejected_keys) == (2, False, 2)
+
+    def test_unknown_key(self) -> None:
+        prov = Provenance()
+        assert prov.locate("NADA") == []
+        assert prov.count("NADA") == 0
+        assert "NADA" not in prov
+
+
+class TestReaderProvenance:
+    def test_records_line_and_offset(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        prov = Provenance()
+        parse_barcodes_from_file(tmp_txt_dir / "coletor_a.txt", layout, prov)
+
+        origins = prov.locate("MCS000PROD001")
+        assert [(o.line, o.offset) for o in origins] == [(1, 0), (4, 30)]
+
+    def test_records_rejected_lines(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        prov = Provenance()
+        parse_barcodes_from_file(tmp_txt_dir / "coletor_a.txt", layout, prov)
+
+        assert prov.locate("linha_invalida") == [
+            Occurrence(str(tmp_txt_dir / "coletor_a.txt"), 2, 14)
+        ]
+
+    def test_rejected_origins_bounded_by_limit(self, tmp_path: Path, layout: LayoutConfig) -> None:
+        path = tmp_path / "lixo.txt"
+        path.write_text("".join(f"lixo{i}\n" for i in range(100)) + "lixo0\n" * 50, encoding="utf-8")
+        rejected = RejectedLines(limit=8)
+        prov = Provenance()
+
+        parse_barcodes_from_file(path, layout, prov, rejected=rejected)
+
+        assert prov.rejected_keys <= rejected.limit
+        assert len(prov) <= rejected.limit
+        assert rejected.most_common(1)[0][0] == "lixo0"
+        assert prov.count("lixo0") >= 1
+
+    def test_same_result_as_plain_parse(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        plain = parse_barcodes_from_file(tmp_txt_dir / "coletor_b.txt", layout)
+        tracked = parse_barcodes_from_file(tmp_txt_dir / "coletor_b.txt", layout, Provenance())
+
+        assert tracked.barcodes == plain.barcodes
+        assert tracked.rejected.most_common() == plain.rejected.most_common()
+
+    def test_read_all_spans_files(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        result = read_all_barcodes(layout, tmp_txt_dir, provenance=Provenance())
+
+        assert result.provenance is not None
+        origins = result.provenance.locate("MCS000PROD001")
+        assert [(Path(o.file).name, o.line, o.offset) for o in origins] == [
+            ("coletor_a.txt", 1, 0),
+            ("coletor_a.txt", 4, 30),
+            ("coletor_b.txt", 2, 15),
+        ]
+
+    def test_disabled_by_default(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        result = read_all_barcodes(layout, tmp_txt_dir)
+        assert result.provenance is None
@@ -75,7 +75,7 @@ class TestParseBarcodes:
 
     def test_no_rejected_when_all_valid(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
         result = parse_barcodes_from_file(tmp_txt_dir / "contagem_02.txt", layout)
-        assert result.rejected == []
+        assert not result.rejected
         assert len(result.barcodes) == 2
 
     def test_uppercases_barcodes(self, tmp_path: Path, layout: LayoutConfig) -> None:
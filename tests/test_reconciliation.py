@@ -0,0 +1,122 @@
+"""Testes para o módulo reconciliation."""
+
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.excel_handler import load_indexed_workbook
+from inventory_count_automation.reconciliation import ExpectedStock, reconcile, to_number
+
+
+@pytest.fixture
+def layout() -> LayoutConfig:
+    return LayoutConfig(
+        col_chave_busca="A",
+        col_qtd_fisico="B",
+        col_qtd_sistema="D",
+        col_custo_unitario="F",
+        header_row=1,
+        data_start_row=2,
+    )
+
+@pytest.fixture
+def planilha(tmp_path: Path) -> Path:
+    """Planilha com barcode (A), saldo do sistema (D) e custo unitário (F)."""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if ws is None:
+        raise RuntimeError("Workbook sem planilha ativa.")
+    ws.append(["Barcode", "QTD Físico", "Descrição", "Saldo", "EAN", "Custo"])
+    ws.append(["PROD001", None, "A", 10, None, 2.5])
+    ws.append(["PROD002", None, "B", 5, None, 100])
+    ws.append(["PROD003", None, "C", "3", None, "1,50"])
+    ws.append(["PROD004", None, "D", 0, None, 7])
+    path = tmp_path / "planilha.xlsx"
+    wb.save(path)
+    return path
+
+
+class TestToNumber:
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (None, 0.0), (3, 3.0), (2.5, 2.5), ("1,50", 1.5), (" 4 ", 4.0), ("n/d", 0.0),
+            ("1.234,56", 1234.56), ("-12.345.678,9", -12345678.9), ("1.234", 1234.0),
+            ("1.5", 1.5), ("", 0.0),
+        ],
+    )
+    def test_converts(self, value: object, expected: float) -> None:
+        assert to_number(value) == expected
+
+    def test_invalid_cells_are_counted(self) -> None:
+        stock = ExpectedStock()
+        stock.add("A", 2, "1.234,56", "n/d")
+        stock.add("B", 3, "abc", None)
+
+        report = reconcile(stock, {}, {"A": 2, "B": 3})
+
+        assert stock.expected.tolist() == [1234.56, 0.0]
+        assert report.invalid_cells == 2
+
+
+class TestIndexReadsStock:
+    def test_stock_read_in_index_pass(self, planilha: Path, layout: LayoutConfig) -> None:
+        indexed = load_indexed_workbook(layout, planilha)
+
+        assert indexed.stock is not None
+        assert indexed.stock.barcodes == ["PROD001", "PROD002", "PROD003", "PROD004"]
+        assert list(indexed.stock.expected) == [10, 5, 3, 0]
+        assert list(indexed.stock.unit_cost) == [2.5, 100, 1.5, 7]
+        assert indexed.stock.has_cost
+
+    def test_no_stock_without_expected_column(self, planilha: Path) -> None:
+        layout = LayoutConfig(col_chave_busca="A", col_qtd_fisico="B")
+        assert load_indexed_workbook(layout, planilha).stock is None
+
+
+class TestReconcile:
+    def test_totals(self, planilha: Path, layout: LayoutConfig) -> None:
+        indexed = load_indexed_workbook(layout, planilha)
+        assert indexed.stock is not None
+        counted = {"PROD001": 12, "PROD002": 4, "PROD004": 2}
+
+        report = reconcile(indexed.stock, counted, indexed.index)
+
+        assert report.rows == 4
+        assert report.rows_with_variance == 4
+        assert report.expected_total == 18
+        assert report.counted_total == 18
+        assert report.net_variance == 0            # +2 -1 -3 +2
+        assert report.abs_variance == 8
+        assert report.net_value_impact == pytest.approx(2 * 2.5 - 100 - 3 * 1.5 + 2 * 7)
+
+    def test_top_sorted_by_value_impact(self, planilha: Path, layout: LayoutConfig) -> None:
+        indexed = load_indexed_workbook(layout, planilha)
+        assert indexed.stock is not None
+        counted = {"PROD001": 12, "PROD002": 4, "PROD003": 3, "PROD004": 2}
+
+        report = reconcile(indexed.stock, counted, indexed.index, top_n=2)
+
+        assert [d.barcode for d in report.top] == ["PROD002", "PROD004"]
+        assert report.top[0].pct == pytest.approx(-0.2)
+        assert report.top[1].pct is None  # esperado = 0
+
+    def test_top_by_variance_without_cost(self) -> None:
+        stock = ExpectedStock()
+        stock.add("A", 2, 10)
+        stock.add("B", 3, 1)
+        report = reconcile(stock, {"A": 9, "B": 5}, {"A": 2, "B": 3})
+
+        assert [d.barcode for d in report.top] == ["B", "A"]
+        assert not report.has_cost
+
+    def test_duplicate_barcode_counts_on_last_row(self) -> None:
+        stock = ExpectedStock()
+        stock.add("A", 2, 3)
+        stock.add("A", 3, 3)
+        report = reconcile(stock, {"A": 3}, {"A": 3})
+
+        assert report.counted_total == 3
+        assert [(d.row, d.variance) for d in report.top] == [(2, -3)]
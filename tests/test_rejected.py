@@ -0,0 +1,154 @@
+"""Testes para o módulo rejected."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import inventory_count_automation
+from inventory_count_automation.rejected import RejectedLines, write_rejected_report
+
+
+@pytest.fixture
+def flooded() -> RejectedLines:
+    """100.000 linhas distintas de ruído e duas linhas muito frequentes."""
+    rejected = RejectedLines(limit=1000)
+    for i in range(100_000):
+        rejected.add(f"ruido-{i}")
+        if i % 10 == 0:
+            rejected.add("PREFIXO_ERRADO_1")
+        if i % 20 == 0:
+            rejected.add("PREFIXO_ERRADO_2")
+    return rejected
+
+
+class TestExactMode:
+    def test_counts_below_limit(self) -> None:
+        rejected = RejectedLines(limit=10)
+        for line in ["b", "a", "b", "c", "b", "a"]:
+            rejected.add(line)
+
+        assert not rejected.approximate
+        assert rejected.total == len(rejected) == 6
+        assert rejected.distinct == 3
+        assert rejected.most_common() == [("b", 3), ("a", 2), ("c", 1)]
+        assert rejected.most_common(1) == [("b", 3)]
+        assert "a" in rejected and "z" not in rejected
+        assert rejected.error_bound == 0
+
+    def test_unlimited_keeps_everything(self) -> None:
+        rejected = RejectedLines(limit=None)
+        for i in range(5000):
+            rejected.add(str(i))
+        assert not rejected.approximate
+        assert rejected.distinct == 5000
+
+    def test_from_counts(self) -> None:
+        rejected = RejectedLines.from_counts({"x": 3, "y": 1})
+        assert rejected.total == 4
+        assert rejected.count("x") == 3
+
+    def test_invalid_limit(self) -> None:
+        with pytest.raises(ValueError):
+            RejectedLines(limit=1)
+
+
+class TestApproximateMode:
+    def test_memory_is_bounded(self, flooded: RejectedLines) -> None:
+        assert flooded.approximate
+        assert len(flooded.most_common()) <= 1000
+        assert flooded.total == 100_000 + 10_000 + 5_000
+
+    def test_heavy_hitters_are_kept(self, flooded: RejectedLines) -> None:
+        (first, n1), (second, n2) = flooded.most_common(2)
+        assert (first, second) == ("PREFIXO_ERRADO_1", "PREFIXO_ERRADO_2")
+        # Limite inferior, com erro máximo conhecido
+        assert n1 <= 10_000 <= n1 + flooded.error_bound
+        assert n2 <= 5_000 <= n2 + flooded.error_bound
+
+    def test_distinct_estimate(self, flooded: RejectedLines) -> None:
+        assert flooded.distinct == pytest.approx(100_002, rel=0.05)
+
+
+class TestMerge:
+    def test_exact_merge_sums_counts(self) -> None:
+        a = RejectedLines.from_counts({"x": 3, "y": 1})
+        a.merge(RejectedLines.from_counts({"x": 1, "z": 2}))
+
+        assert not a.approximate
+        assert a.total == 7
+        assert a.most_common() == [("x", 4), ("z", 2), ("y", 1)]
+
+    def test_merge_matches_single_stream(self) -> None:
+        lines = [f"ruido-{i}" for i in range(20_000)]
+        single, left, right = RejectedLines(limit=100), RejectedLines(limit=100), RejectedLines(limit=None)
+        for line in lines:
+            single.add(line)
+        for line in lines[:15_000]:
+            left.add(line)
+        for line in lines[15_000:]:
+            right.add(line)  # exato: o sketch é montado no merge
+
+        left.merge(right)
+        assert left.approximate
+        assert left.total == single.total
+        assert left.sketch == single.sketch
+        assert left.distinct == single.distinct
+
+    def test_merge_sums_error_bounds(self, flooded: RejectedLines) -> None:
+        other = RejectedLines.from_state(
+            dict(flooded.most_common()), flooded.total, flooded.error_bound, flooded.sketch, limit=1000,
+        )
+        bound = flooded.error_bound
+        flooded.merge(other)
+
+        assert flooded.error_bound >= 2 * bound
+        assert flooded.most_common(1)[0][0] == "PREFIXO_ERRADO_1"
+        assert flooded.distinct == pytest.approx(100_002, rel=0.05)
+
+    def test_sketch_is_stable_across_processes(self) -> None:
+        code = (
+            "from inventory_count_automation.rejected import RejectedLines\n"
+            "r = RejectedLines(limit=2)\n"
+            "for line in ('a', 'b', 'c', 'd'): r.add(line)\n"
+            "print(r.sketch.hex())\n"
+        )
+        src = str(Path(inventory_count_automation.__file__).parents[1])
+        sketches = {
+            subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                env={**os.environ, "PYTHONHASHSEED": seed, "PYTHONPATH": src},
+            ).stdout
+            for seed in ("1", "2")
+        }
+        assert len(sketches) == 1
+
+    def test_rejects_invalid_sketch(self) -> None:
+        with pytest.raises(ValueError):
+            RejectedLines.from_state({}, 0, sketch=b"curto")
+
+
+class TestReport:
+    def test_pages(self) -> None:
+        rejected = RejectedLines.from_counts({f"l{i:02d}": 100 - i for i in range(25)})
+
+        assert rejected.pages(10) == 3
+        assert [line for line, _ in rejected.page(1, 10)] == [f"l{i:02d}" for i in range(10)]
+        assert [line for line, _ in rejected.page(3, 10)] == [f"l{i:02d}" for i in range(20, 25)]
+        assert rejected.page(4, 10) == []
+        with pytest.raises(ValueError):
+            rejected.page(0, 10)
+
+    def test_write_report(self, tmp_path: Path) -> None:
+        path = tmp_path / "rejeitadas.tsv"
+        write_rejected_report(RejectedLines.from_counts({"x": 1, "y": 2}), path)
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines[-3:] == ["ocorrencias\tlinha", "2\ty", "1\tx"]
+
+    def test_write_report_approximate(self, flooded: RejectedLines, tmp_path: Path) -> None:
+        path = tmp_path / "rejeitadas.tsv"
+        write_rejected_report(flooded, path)
+        assert "estimativa" in path.read_text(encoding="utf-8")
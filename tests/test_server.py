@@ -0,0 +1,118 @@
+"""Testes para o módulo server."""
+
+from collections.abc import Iterator
+from http.client import HTTPConnection
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+import json
+import threading
+
+import openpyxl
+import pytest
+
+import inventory_count_automation.settings as settings
+from inventory_count_automation.settings import AppConfig, LayoutConfig, save_config
+from inventory_count_automation.session import CountSession
+from inventory_count_automation.server import SessionServer
+
+
+@pytest.fixture
+def base_url(tmp_path: Path) -> Iterator[str]:
+    settings._config_cache.clear()
+    layout = LayoutConfig(col_chave_busca="A", col_qtd_fisico="B", barcode_prefix="MCS000")
+    config_path = tmp_path / "config.toml"
+    save_config(AppConfig(active_layout="loja", layouts={"loja": layout}), config_path)
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if ws is None:
+        raise RuntimeError("Workbook sem planilha ativa.")
+    ws.append(["Barcode", "QTD Físico"])
+    ws.append(["MCS000PROD001", None])
+    planilha = tmp_path / "planilha.xlsx"
+    wb.save(planilha)
+
+    server = SessionServer(CountSession(config_path, planilha_path=planilha), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _call(
+    url: str, data: bytes | None = None, content_type: str = "application/json", headers: dict[str, str] | None = None,
+) -> tuple[int, dict]:
+    request = Request(url, data=data, method="POST" if data is not None else "GET", headers=headers or {})
+    request.add_header("Content-Type", content_type)
+    try:
+        with urlopen(request, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestServer:
+    def test_ingest_query_match_flush(self, base_url: str) -> None:
+        status, body = _call(f"{base_url}/ingest", json.dumps({"lines": ["MCS000PROD001", "MCS000X", "lixo"]}).encode())
+        assert status == 200
+        assert body == {"accepted": 2, "rejected": 1}
+
+        _call(f"{base_url}/ingest", json.dumps({"lines": ["MCS000PROD001"]}).encode())
+
+        assert _call(f"{base_url}/counts")[1] == {"MCS000PROD001": 2, "MCS000X": 1}
+        assert _call(f"{base_url}/counts/mcs000prod001")[1] == {
+            "barcode": "MCS000PROD001", "qty": 2, "row": 2, "status": "PENDING",
+        }
+        assert _call(f"{base_url}/match", b"")[1]["not_found"] == ["MCS000X"]
+        assert _call(f"{base_url}/flush", b"")[1]["matched"] == 1
+        assert _call(f"{base_url}/rejected")[1]["lines"] == [{"line": "lixo", "count": 1}]
+        assert _call(f"{base_url}/health")[1]["units"] == 3
+
+    def test_errors(self, base_url: str) -> None:
+        assert _call(f"{base_url}/nada")[0] == 404
+        assert _call(f"{base_url}/ingest", b"{")[0] == 400
+        assert _call(f"{base_url}/ingest", b'{"lines": "x"}')[0] == 400
+        assert _call(f"{base_url}/rejected?limit=x")[0] == 400
+        assert _call(f"{base_url}/reconcile")[0] == 400  # layout sem col_qtd_sistema
+
+    @pytest.mark.parametrize("length", ["-1", "x"])
+    def test_rejects_invalid_content_length(self, base_url: str, length: str) -> None:
+        connection = HTTPConnection(urlsplit(base_url).netloc, timeout=5)
+        try:
+            connection.putrequest("POST", "/ingest")
+            connection.putheader("Content-Type", "application/json")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == 400
+            assert "Content-Length" in json.loads(response.read())["error"]
+        finally:
+            connection.close()
+
+    @pytest.mark.parametrize("content_type", ["text/plain", "application/x-www-form-urlencoded"])
+    def test_post_requires_json(self, base_url: str, content_type: str) -> None:
+        status, body = _call(f"{base_url}/ingest", b"MCS000PROD001\n", content_type=content_type)
+
+        assert status == 415
+        assert "application/json" in body["error"]
+        assert _call(f"{base_url}/reset", b"", content_type=content_type)[0] == 415
+        assert _call(f"{base_url}/counts")[1] == {}
+
+    def test_rejects_origin_header(self, base_url: str) -> None:
+        headers = {"Origin": "http://exemplo.com"}
+
+        assert _call(f"{base_url}/ingest", b'{"lines": ["MCS000PROD001"]}', headers=headers)[0] == 403
+        assert _call(f"{base_url}/counts", headers=headers)[0] == 403
+        assert _call(f"{base_url}/counts")[1] == {}
+
+    def test_checks_host_header(self, base_url: str) -> None:
+        port = urlsplit(base_url).port
+
+        assert _call(f"{base_url}/health", headers={"Host": f"exemplo.com:{port}"})[0] == 403
+        assert _call(f"{base_url}/health", headers={"Host": f"localhost:{port}"})[0] == 200
+        assert _call(f"{base_url}/health", headers={"Host": "127.0.0.1"})[0] == 200
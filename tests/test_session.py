@@ -0,0 +1,198 @@
+"""Testes para o módulo session."""
+
+from pathlib import Path
+import os
+
+import openpyxl
+import pytest
+
+import inventory_count_automation.settings as settings
+from inventory_count_automation.settings import AppConfig, LayoutConfig, save_config
+from inventory_count_automation.session import CountSession
+from inventory_count_automation.table import Status
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_cache() -> None:
+    settings._config_cache.clear()
+
+@pytest.fixture
+def layout() -> LayoutConfig:
+    return LayoutConfig(
+        planilha_filename="planilha.xlsx",
+        col_chave_busca="A",
+        col_qtd_fisico="B",
+        col_qtd_sistema="C",
+        barcode_prefix="MCS000",
+    )
+
+@pytest.fixture
+def planilha(tmp_path: Path) -> Path:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if ws is None:
+        raise RuntimeError("Workbook sem planilha ativa.")
+    ws.append(["Barcode", "QTD Físico", "Saldo"])
+    ws.append(["MCS000PROD001", None, 2])
+    ws.append(["MCS000PROD002", None, 5])
+    ws.append(["MCS000PROD003", None, 1])
+    path = tmp_path / "planilha.xlsx"
+    wb.save(path)
+    return path
+
+@pytest.fixture
+def config_path(tmp_path: Path, layout: LayoutConfig) -> Path:
+    path = tmp_path / "config.toml"
+    save_config(AppConfig(active_layout="loja", layouts={"loja": layout}), path)
+    return path
+
+@pytest.fixture
+def session(config_path: Path, planilha: Path) -> CountSession:
+    return CountSession(config_path, planilha_path=planilha)
+
+
+def _touch_later(path: Path) -> None:
+    """Garante que a data de modificação mude mesmo em sistemas de arquivos com baixa resolução."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestIngest:
+    def test_counts_and_rejects(self, session: CountSession) -> None:
+        result = session.ingest(["mcs000prod001", "MCS000PROD001 ", "", "lixo", "MCS000PROD002"])
+
+        assert (result.accepted, result.rejected) == (3, 1)
+        assert session.count("MCS000PROD001") == 2
+        assert session.count(" mcs000prod001") == 2
+        assert session.count("MCS000NADA") == 0
+        assert session.counts() == {"MCS000PROD001": 2, "MCS000PROD002": 1}
+        assert "lixo" in session.rejected
+
+    def test_ingest_file(self, session: CountSession, tmp_path: Path) -> None:
+        (tmp_path / "coletor.txt").write_text("MCS000PROD003\nMCS000PROD003\n", encoding="utf-8")
+        assert session.ingest_file(tmp_path / "coletor.txt").accepted == 2
+        assert session.count("MCS000PROD003") == 2
+
+    def test_reset(self, session: CountSession) -> None:
+        session.ingest(["MCS000PROD001", "lixo"])
+        session.match()
+        session.reset()
+
+        assert session.counts() == {}
+        assert not session.rejected
+        assert session.lookup("MCS000PROD001").row == 2  # índice mantido
+
+
+class TestMatchAndFlush:
+    def test_match_does_not_write(self, session: CountSession, planilha: Path) -> None:
+        session.ingest(["MCS000PROD001", "MCS000PROD001", "MCS000FANTASMA"])
+        before = planilha.read_bytes()
+
+        result = session.match()
+
+        assert (result.matched, result.not_found, result.uncounted, result.units) == (1, ["MCS000FANTASMA"], 2, 3)
+        assert planilha.read_bytes() == before
+
+    def test_flush_writes_balances(self, session: CountSession, planilha: Path) -> None:
+        session.ingest(["MCS000PROD001", "MCS000PROD001", "MCS000PROD003"])
+        result = session.flush()
+
+        ws = openpyxl.load_workbook(planilha).active
+        assert result.matched == 2
+        assert (ws["B2"].value, ws["B3"].value, ws["B4"].value) == (2, None, 1)
+        assert session.lookup("MCS000PROD001").status == Status.MATCHED
+        assert not session.reload()  # a gravação da própria sessão não força recarga
+
+    def test_flush_after_reset_clears_previous_balances(self, session: CountSession, planilha: Path) -> None:
+        session.ingest(["MCS000PROD001", "MCS000PROD001", "MCS000PROD002"])
+        session.flush()
+        session.reset()
+        session.ingest(["MCS000PROD002"])
+        session.flush()
+
+        ws = openpyxl.load_workbook(planilha).active
+        assert (ws["B2"].value, ws["B3"].value, ws["B4"].value) == (None, 1, None)
+        assert session.lookup("MCS000PROD001").status == Status.UNCOUNTED
+
+    def test_index_is_loaded_once(self, session: CountSession, monkeypatch: pytest.MonkeyPatch) -> None:
+        session.match()
+        import inventory_count_automation.session as module
+        monkeypatch.setattr(module, "load_indexed_workbook", lambda *a, **k: pytest.fail("recarregou"))
+
+        session.ingest(["MCS000PROD002"])
+        assert session.match().matched == 1
+        assert session.lookup("MCS000PROD002").qty == 1
+
+    def test_reconcile(self, session: CountSession) -> None:
+        session.ingest(["MCS000PROD001"] * 3)
+        report = session.reconcile()
+        assert report.expected_total == 8
+        assert report.counted_total == 3
+
+    def test_missing_planilha_raises(self, config_path: Path, tmp_path: Path) -> None:
+        session = CountSession(config_path, planilha_path=tmp_path / "nao_existe.xlsx")
+        with pytest.raises(FileNotFoundError):
+            session.match()
+
+
+class TestReload:
+    def test_unchanged_config_is_not_reloaded(self, session: CountSession, config_path: Path) -> None:
+        digest = session.config_digest
+        _touch_later(config_path)
+        assert not session.reload()
+        assert session.config_digest == digest
+
+    def test_layout_change_keeps_counts(self, session: CountSession, config_path: Path, layout: LayoutConfig) -> None:
+        session.ingest(["MCS000PROD001", "XYZ1"])
+        session.match()
+
+        layout.barcode_prefix = "XYZ"
+        save_config(AppConfig(active_layout="loja", layouts={"loja": layout}), config_path)
+        _touch_later(config_path)
+
+        assert session.reload()
+        assert session.layout.barcode_prefix == "XYZ"
+        assert session.ingest(["XYZ2"]).accepted == 1
+        assert session.count("MCS000PROD001") == 1
+
+    def test_column_change_reindexes(self, session: CountSession, config_path: Path, layout: LayoutConfig) -> None:
+        session.ingest(["MCS000PROD001"])
+        session.match()
+
+        layout.col_qtd_fisico = "D"
+        save_config(AppConfig(active_layout="loja", layouts={"loja": layout}), config_path)
+        _touch_later(config_path)
+        assert session.reload()
+
+        session.flush()
+        assert session.count("MCS000PROD001") == 1
+        assert session.lookup("MCS000PROD001").row == 2
+
+    def test_planilha_change_reindexes(self, session: CountSession, planilha: Path) -> None:
+        session.ingest(["MCS000PROD004"])
+        assert session.match().not_found == ["MCS000PROD004"]
+
+        wb = openpyxl.load_workbook(planilha)
+        wb.active.append(["MCS000PROD004"])
+        wb.save(planilha)
+        _touch_later(planilha)
+
+        assert session.reload()
+        assert session.match().not_found == []
+        assert session.count("MCS000PROD004") == 1
+
+    def test_auto_reload(self, config_path: Path, planilha: Path) -> None:
+        session = CountSession(config_path, planilha_path=planilha, auto_reload=True)
+        session.ingest(["MCS000PROD004"])
+        assert session.match().matched == 0
+
+        wb = openpyxl.load_workbook(planilha)
+        wb.active.append(["MCS000PROD004"])
+        wb.save(planilha)
+        _touch_later(planilha)
+
+        assert session.match().matched == 1
+
+    def test_unknown_layout_raises(self, config_path: Path) -> None:
+        with pytest.raises(ValueError):
+            CountSession(config_path, layout_name="nao_existe")
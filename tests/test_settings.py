@@ -0,0 +1,134 @@
+"""Testes para o módulo settings."""
+
+from pathlib import Path
+
+import pytest
+
+import inventory_count_automation.settings as settings
+from inventory_count_automation.settings import (
+    AppConfig,
+    LayoutConfig,
+    compile_layout,
+    load_config,
+    save_config,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_memory_cache() -> None:
+    """Garante que cada teste comece sem o cache em memória de load_config."""
+    settings._config_cache.clear()
+
+@pytest.fixture
+def config_path(tmp_path: Path) -> Path:
+    config = AppConfig(
+        active_layout="loja",
+        layouts={
+            "loja": LayoutConfig(
+                col_chave_busca="H",
+                col_qtd_fisico="AA",
+                col_ean="E",
+                barcode_prefix="MCS000",
+            ),
+        },
+    )
+    path = tmp_path / "config.toml"
+    save_config(config, path)
+    return path
+
+
+class TestCompileLayout:
+    def test_columns_become_indexes(self) -> None:
+        compiled = compile_layout(LayoutConfig(col_chave_busca="H", col_qtd_fisico="AA", col_sku="C"))
+        assert compiled.key_col == 8
+        assert compiled.qty_col == 27
+        assert compiled.secondary_cols == {"col_sku": 3}
+
+    def test_validator_and_normalizer(self) -> None:
+        compiled = LayoutConfig(barcode_prefix="MCS000").compiled
+        assert compiled.validate("mcs000abc")
+        assert not compiled.validate("XYZ")
+        assert compiled.normalize("  mcs000abc ") == "MCS000ABC"
+
+    def test_compiles_once_per_layout_values(self) -> None:
+        first = LayoutConfig(col_chave_busca="B").compiled
+        second = LayoutConfig(col_chave_busca="B").compiled
+        assert first is second
+
+    def test_invalid_column_raises(self) -> None:
+        with pytest.raises(ValueError):
+            compile_layout(LayoutConfig(col_chave_busca="1"))
+
+
+class TestLoadConfigCache:
+    def test_caches_in_memory(self, config_path: Path) -> None:
+        config = load_config(config_path)
+
+        assert config.active.col_chave_busca == "H"
+        assert len(settings._config_cache) == 1
+
+    def test_does_not_write_to_disk(self, config_path: Path) -> None:
+        load_config(config_path)
+        load_config(config_path)
+        assert [p.name for p in config_path.parent.iterdir()] == ["config.toml"]
+
+    def test_returns_independent_copies(self, config_path: Path) -> None:
+        first = load_config(config_path)
+        first.active.description = "alterado"
+
+        second = load_config(config_path)
+        assert second.active.description != "alterado"
+
+    def test_invalidated_when_toml_changes(self, config_path: Path) -> None:
+        config = load_config(config_path)
+
+        config.active.col_chave_busca = "J"
+        save_config(config, config_path)
+
+        reloaded = load_config(config_path)
+        assert reloaded.active.col_chave_busca == "J"
+        assert reloaded.active.compiled.key_col == 10
+
+    def test_caches_are_bounded(self, config_path: Path) -> None:
+        config = load_config(config_path)
+        for i in range(settings.CONFIG_CACHE_SIZE + settings.COMPILED_CACHE_SIZE):
+            config.active.description = f"versão {i}"
+            save_config(config, config_path)
+            load_config(config_path)
+
+        assert len(settings._config_cache) == settings.CONFIG_CACHE_SIZE
+        assert len(settings._compiled_layouts) <= settings.COMPILED_CACHE_SIZE
+        assert settings._build_barcode_pattern.cache_info().maxsize == settings.PATTERN_CACHE_SIZE
+        assert load_config(config_path).active.description == config.active.description
+
+    def test_missing_file_returns_default(self, tmp_path: Path) -> None:
+        config = load_config(tmp_path / "nao_existe.toml")
+        assert config.active_layout == "default"
+
+
+class TestSaveConfig:
+    def test_atomic_write_leaves_no_temp_files(self, config_path: Path) -> None:
+        config = load_config(config_path)
+        config.active.description = "nova"
+        save_config(config, config_path)
+
+        assert [p.name for p in config_path.parent.iterdir()] == ["config.toml"]
+        assert load_config(config_path).active.description == "nova"
+
+    def test_preserves_file_permissions(self, config_path: Path) -> None:
+        config_path.chmod(0o640)
+        save_config(load_config(config_path), config_path)
+        assert config_path.stat().st_mode & 0o777 == 0o640
+
+    def test_failed_write_keeps_original(self, config_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        original = config_path.read_bytes()
+
+        def fail(*args, **kwargs):
+            raise OSError("disco cheio")
+
+        monkeypatch.setattr(settings.tomli_w, "dump", fail)
+        with pytest.raises(OSError):
+            save_config(AppConfig(), config_path)
+
+        assert config_path.read_bytes() == original
+        assert [p.name for p in config_path.parent.iterdir()] == ["config.toml"]
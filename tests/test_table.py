@@ -0,0 +1,126 @@
+"""Testes para o módulo table."""
+
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from inventory_count_automation.settings import LayoutConfig
+from inventory_count_automation.counter import count_barcodes
+from inventory_count_automation.excel_handler import assign_balances
+from inventory_count_automation.reader import read_all_barcodes
+from inventory_count_automation.table import BarcodeTable, Status
+
+
+@pytest.fixture
+def layout() -> LayoutConfig:
+    return LayoutConfig(
+        col_chave_busca="A",
+        col_qtd_fisico="B",
+        header_row=1,
+        data_start_row=2,
+        barcode_prefix="MCS000",
+    )
+
+@pytest.fixture
+def tmp_txt_dir(tmp_path: Path) -> Path:
+    txt_dir = tmp_path / "txt"
+    txt_dir.mkdir()
+    (txt_dir / "a.txt").write_text("MCS000PROD001\nmcs000prod001\nMCS000PROD002\n", encoding="utf-8")
+    (txt_dir / "b.txt").write_text("MCS000PROD001\nMCS000FANTASMA\n", encoding="utf-8")
+    return txt_dir
+
+@pytest.fixture
+def sample_workbook(tmp_path: Path) -> tuple[openpyxl.Workbook, Path]:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    if ws is None:
+        raise RuntimeError("Workbook sem planilha ativa.")
+    ws["A1"] = "Barcode"
+    for row, barcode in enumerate(["MCS000PROD001", "MCS000PROD002", "MCS000PROD003"], start=2):
+        ws[f"A{row}"] = barcode
+    path = tmp_path / "planilha.xlsx"
+    wb.save(path)
+    return openpyxl.load_workbook(path), path
+
+
+class TestBarcodeTable:
+    def test_intern_returns_same_instance(self) -> None:
+        table = BarcodeTable()
+        first = table.intern("".join(["MCS000", "X"]))
+        second = table.intern("".join(["MCS000", "X"]))
+        assert first is second
+        assert len(table) == 1
+
+    def test_ids_are_sequential(self) -> None:
+        table = BarcodeTable()
+        assert table.id_of("A") == 0
+        assert table.id_of("B") == 1
+        assert table.id_of("A") == 0
+
+    def test_record_fields(self) -> None:
+        table = BarcodeTable()
+        table.add_qty("MCS000X", 3)
+        table.set_row("MCS000X", 7)
+        table.set_status("MCS000X", Status.MATCHED)
+
+        record = table.record("MCS000X")
+        assert (record.id, record.barcode, record.row, record.qty, record.status) == (
+            0, "MCS000X", 7, 3, Status.MATCHED,
+        )
+
+    def test_record_without_row(self) -> None:
+        table = BarcodeTable()
+        table.add_qty("MCS000X")
+        assert table.record("MCS000X").row is None
+        assert table.record("MCS000X").status is Status.PENDING
+
+    def test_record_unknown_raises(self) -> None:
+        with pytest.raises(KeyError):
+            BarcodeTable().record("NADA")
+
+    def test_counted_view_is_sorted_and_skips_uncounted(self) -> None:
+        table = BarcodeTable()
+        table.set_row("MCS000Z", 2)
+        table.add_qty("MCS000B", 2)
+        table.add_qty("MCS000A", 1)
+        assert table.counted() == {"MCS000A": 1, "MCS000B": 2}
+        assert list(table.counted()) == ["MCS000A", "MCS000B"]
+
+    def test_records_have_no_dict(self) -> None:
+        table = BarcodeTable()
+        table.add_qty("MCS000A")
+        assert not hasattr(next(iter(table)), "__dict__")
+
+
+class TestTableIntegration:
+    def test_reader_shares_barcode_instances(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        table = BarcodeTable()
+        result = read_all_barcodes(layout, tmp_txt_dir, table=table)
+
+        prod001 = [b for b in result.barcodes if b == "MCS000PROD001"]
+        assert len(prod001) == 3
+        assert all(b is prod001[0] for b in prod001)
+
+    def test_counter_fills_table(self, tmp_txt_dir: Path, layout: LayoutConfig) -> None:
+        table = BarcodeTable()
+        result = read_all_barcodes(layout, tmp_txt_dir, table=table)
+        counted = count_barcodes(result.barcodes, table)
+
+        assert table.counted() == counted
+
+    def test_match_updates_status_and_rows(
+        self, tmp_txt_dir: Path, sample_workbook, layout: LayoutConfig,
+    ) -> None:
+        wb, path = sample_workbook
+        table = BarcodeTable()
+        result = read_all_barcodes(layout, tmp_txt_dir, table=table)
+        counted = count_barcodes(result.barcodes, table)
+
+        balances = assign_balances(layout, counted, wb=wb, save_path=path, table=table)
+
+        assert sorted(table.with_status(Status.MATCHED)) == sorted(balances["matched"])
+        assert table.with_status(Status.NOT_FOUND) == balances["not_found"] == ["MCS000FANTASMA"]
+        assert table.with_status(Status.UNCOUNTED) == ["MCS000PROD003"]
+        assert table.index() == {"MCS000PROD001": 2, "MCS000PROD002": 3, "MCS000PROD003": 4}
+        assert table.record("MCS000PROD001").qty == 3